@@ -1,5 +1,6 @@
 import streamlit as st
 import openai
+import rate_limit
 import sys
 import random
 
@@ -80,7 +81,7 @@ def generate_article(content, writing_styles, style_weights, user_prompt, keywor
     
     # Generate content using the OpenAI Chat API
     try:
-        response = openai.ChatCompletion.create(
+        response = rate_limit.call('openai', openai.ChatCompletion.create,
             model="gpt-3.5-turbo",
             messages=messages,
             max_tokens=1024
@@ -118,7 +119,7 @@ def main():
             {"role": "user", "content": revision_requests}
         ]
         try:
-            response = openai.ChatCompletion.create(
+            response = rate_limit.call('openai', openai.ChatCompletion.create,
                 model="gpt-3.5-turbo",
                 messages=revision_messages
             )
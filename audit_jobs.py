@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+JOBS_DB = os.environ.get('AUDIT_JOBS_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.audit_jobs.sqlite'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    job TEXT NOT NULL REFERENCES jobs(id),
+    url TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated REAL NOT NULL,
+    PRIMARY KEY (job, url)
+);
+"""
+
+
+def job_id(kind, params):
+    # The same app with the same inputs is the same job, so rerunning it resumes.
+    return hashlib.sha256(json.dumps([kind, params], sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+class AuditJobs:
+    # Durable per-URL state for long audits. Each page's outcome is committed
+    # as soon as it is known, so a crash or a dropped session loses at most the
+    # page in flight.
+    def __init__(self, path=JOBS_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def _execute(self, sql, args=()):
+        with self._lock:
+            return self._conn.execute(sql, args).fetchall()
+
+    def job(self, kind, params):
+        ident = job_id(kind, params)
+        now = time.time()
+        self._execute(
+            'INSERT INTO jobs (id, kind, params, status, created, updated) VALUES (?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT(id) DO NOTHING',
+            (ident, kind, json.dumps(params, sort_keys=True), 'running', now, now))
+        job = AuditJob(self, ident)
+        job._touch()
+        return job
+
+
+class AuditJob:
+    def __init__(self, jobs, ident):
+        self.jobs = jobs
+        self.id = ident
+
+    def _touch(self, status='running'):
+        self.jobs._execute('UPDATE jobs SET status = ?, updated = ? WHERE id = ?', (status, time.time(), self.id))
+
+    def _set(self, url, status, result=None, error=None):
+        # Upsert keeps the row's rowid, so completed() stays in first-seen order.
+        self.jobs._execute(
+            'INSERT INTO pages (job, url, status, result, error, attempts, updated) VALUES (?, ?, ?, ?, ?, 1, ?) '
+            'ON CONFLICT(job, url) DO UPDATE SET status = excluded.status, result = excluded.result, '
+            'error = excluded.error, attempts = attempts + 1, updated = excluded.updated',
+            (self.id, url, status, result, error, time.time()))
+
+    def record(self, url, result):
+        self._set(url, 'done', result=json.dumps(result))
+
+    def fail(self, url, error):
+        self._set(url, 'error', error=str(error))
+
+    def completed(self):
+        rows = self.jobs._execute(
+            "SELECT url, result FROM pages WHERE job = ? AND status = 'done' ORDER BY rowid", (self.id,))
+        return {url: json.loads(result) for url, result in rows}
+
+    def failed(self):
+        rows = self.jobs._execute(
+            "SELECT url, error FROM pages WHERE job = ? AND status = 'error' ORDER BY rowid", (self.id,))
+        return dict(rows)
+
+    def pending(self, urls):
+        # Failed pages are retried; only completed ones are skipped.
+        done = self.completed()
+        return [url for url in urls if url not in done]
+
+    def finish(self):
+        self._touch('failed' if self.failed() else 'done')
+
+    def reset(self):
+        self.jobs._execute('DELETE FROM pages WHERE job = ?', (self.id,))
+        self._touch()
+
+
+_audit_jobs = None
+_audit_jobs_lock = threading.Lock()
+
+
+def get_audit_jobs():
+    global _audit_jobs
+    with _audit_jobs_lock:
+        if _audit_jobs is None:
+            _audit_jobs = AuditJobs()
+        return _audit_jobs
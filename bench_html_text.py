@@ -0,0 +1,78 @@
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+import html_text
+
+# Usage: python bench_html_text.py [page.html | https://... ...]
+# Without arguments a synthetic script-heavy page is used.
+
+
+def legacy_paragraph_text(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    return " ".join([para.text for para in soup.find_all('p')])
+
+
+def legacy_content_text(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    for tag in soup.find_all(['header', 'footer', 'nav']):
+        tag.decompose()
+    return ' '.join([tag.get_text() for tag in soup.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])])
+
+
+def legacy_page_text(html):
+    return BeautifulSoup(html, 'html.parser').get_text()
+
+
+def synthetic_page(paragraphs=400, scripts=200):
+    sentence = "We empower curious students to explore, discover and create something new. "
+    parts = ['<!DOCTYPE html><html><head><meta charset="utf-8"><title>University</title>']
+    parts += [f'<script>window.d{i} = {{"k": "{"x" * 400}"}};</script>' for i in range(scripts)]
+    parts.append('</head><body><header><nav>')
+    parts += [f'<a href="/section/{i}">Section {i}</a>' for i in range(80)]
+    parts.append('</nav></header><main>')
+    for i in range(paragraphs):
+        parts.append(f'<div class="card"><h2>Heading {i}</h2><p>{sentence * 3}<a href="/{i}">more</a></p><span>{sentence}</span></div>')
+    parts.append('</main><footer><p>Copyright</p></footer></body></html>')
+    return ''.join(parts).encode('utf-8')
+
+
+def load(source):
+    if source.startswith(('http://', 'https://')):
+        import http_client
+        return http_client.get(source).content
+    with open(source, 'rb') as f:
+        return f.read()
+
+
+def timed(function, pages, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in pages:
+            function(page)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    pages = [load(source) for source in sys.argv[1:]] or [synthetic_page()]
+    repeat = 5
+    print(f"{len(pages)} page(s), {sum(len(page) for page in pages) / 1024:.0f} KiB, best of {repeat}")
+    cases = [
+        ('paragraph_text', legacy_paragraph_text, html_text.paragraph_text),
+        ('content_text', legacy_content_text, html_text.content_text),
+        ('page_text', legacy_page_text, html_text.page_text),
+    ]
+    for name, legacy, extract in cases:
+        baseline = timed(legacy, pages, repeat)
+        print(f"{name:15} legacy soup      {baseline * 1000:8.1f} ms")
+        for backend in html_text.BACKENDS:
+            same = all(extract(page, backend=backend) == legacy(page) for page in pages)
+            elapsed = timed(lambda page: extract(page, backend=backend), pages, repeat)
+            print(f"{name:15} {backend:16} {elapsed * 1000:8.1f} ms  {baseline / elapsed:5.1f}x  {'same text' if same else 'TEXT DIFFERS'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from page_cache import memoize
+from rate_limit import CHUNK_CONCURRENCY
+
+# Content-defined chunking in the style of FastCDC, over paragraphs instead
+# of bytes. No chunk ends before MIN_CHUNK_CHARS. Between the minimum and
+# AVG_CHUNK_CHARS a chunk ends after a paragraph whose hash is a multiple of
+# STRICT_MODULUS, and past the average after one whose hash is a multiple of
+# LOOSE_MODULUS. MAX_CHUNK_CHARS is a hard cap. Chunks stay close to the old
+# 3000-character slices, so a first audit makes about as many calls, while
+# boundaries still follow the text: an edit changes the chunk holding it and
+# boundaries fall back into step within a chunk or two.
+MIN_CHUNK_CHARS = 2400
+AVG_CHUNK_CHARS = 3000
+MAX_CHUNK_CHARS = 4000
+STRICT_MODULUS = 8
+LOOSE_MODULUS = 2
+
+
+def paragraphs(text):
+    # Extracted page text has one block per line.
+    return [line.strip() for line in text.split('\n') if line.strip()]
+
+
+def _pieces(paragraph, max_chars):
+    # Paragraphs longer than a chunk are split between words.
+    if len(paragraph) <= max_chars:
+        yield paragraph
+        return
+    words, size = [], 0
+    for word in paragraph.split():
+        if words and size + len(word) + 1 > max_chars:
+            yield ' '.join(words)
+            words, size = [], 0
+        words.append(word)
+        size += len(word) + 1
+    if words:
+        yield ' '.join(words)
+
+
+def _is_boundary(piece, size, min_chars, avg_chars):
+    if size < min_chars:
+        return False
+    modulus = STRICT_MODULUS if size < avg_chars else LOOSE_MODULUS
+    return zlib.crc32(piece.encode('utf-8')) % modulus == 0
+
+
+def block_chunks(blocks, max_chars=MAX_CHUNK_CHARS, min_chars=MIN_CHUNK_CHARS, avg_chars=AVG_CHUNK_CHARS):
+    chunks, current, size = [], [], 0
+    for block in blocks:
+        for piece in _pieces(block, max_chars):
+            if current and size + len(piece) + 1 > max_chars:
+                chunks.append('\n'.join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + 1
+            if _is_boundary(piece, size, min_chars, avg_chars):
+                chunks.append('\n'.join(current))
+                current, size = [], 0
+    if current:
+        chunks.append('\n'.join(current))
+    return chunks
+
+
+def analyze_blocks(name, context, text, analyze_chunk, max_chars=MAX_CHUNK_CHARS, max_in_flight=CHUNK_CONCURRENCY):
+    # Runs analyze_chunk over the text's paragraph chunks and returns the
+    # results in page order. Each result is memoized by the hash of context
+    # (the prompt) plus the chunk, so only chunks not analyzed before are sent,
+    # concurrently.
+    chunks = block_chunks(paragraphs(text), max_chars)
+
+    def run(chunk):
+        return memoize(name, context + chunk, lambda: analyze_chunk(chunk))
+
+    if len(chunks) <= 1 or max_in_flight <= 1:
+        return [run(chunk) for chunk in chunks]
+    executor = ThreadPoolExecutor(max_workers=min(max_in_flight, len(chunks)))
+    try:
+        return list(executor.map(run, chunks))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
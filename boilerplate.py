@@ -0,0 +1,219 @@
+import hashlib
+import math
+import re
+from collections import Counter, defaultdict
+
+from fetching import host_of
+from html_text import XML_DECLARATION_RE, decode_html, page_text
+from canonical_urls import normalize_url
+
+try:
+    import lxml.html
+    import lxml.etree
+except ImportError:
+    lxml = None
+
+BLOCK_TAGS = frozenset((
+    'address', 'article', 'aside', 'blockquote', 'body', 'caption', 'dd', 'details', 'dialog', 'div', 'dl', 'dt',
+    'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li',
+    'main', 'nav', 'ol', 'p', 'pre', 'section', 'summary', 'table', 'td', 'th', 'tr', 'ul',
+))
+HEADING_TAGS = frozenset(('h1', 'h2', 'h3', 'h4', 'h5', 'h6'))
+SKIP_TAGS = ('script', 'style', 'noscript', 'template', 'iframe', 'svg', 'canvas', 'button', 'select', 'textarea')
+# Page chrome, unless it sits inside the main content (e.g. an article's own <header>).
+# Cached content_blocks() results are keyed by this; bump it whenever block
+# extraction or chrome detection changes what a page yields.
+EXTRACTION_VERSION = 2
+CHROME_TAGS = frozenset(('header', 'footer', 'nav', 'aside'))
+CHROME_ROLES = frozenset(('navigation', 'banner', 'contentinfo', 'complementary', 'search'))
+# Matched against whole class/id tokens or their -/_ separated parts, so
+# 'share-bar' is chrome and 'shareholder-report' is not.
+CHROME_CLASS_RE = re.compile(
+    r'(?:^|[\s_-])(?:cookies?|consent|gdpr|breadcrumbs?|skip-(?:link|to)|social|share|sharing|newsletter)(?=$|[\s_-])',
+    re.IGNORECASE)
+CONTENT_TAGS = frozenset(('main', 'article'))
+
+# Block classification after boilerpipe/jusText: link density is the share of a
+# block's words inside <a>; text density is words per full 80-character line.
+MAX_LINK_DENSITY = 0.33
+MIN_TEXT_DENSITY = 8
+LINE_WIDTH = 80
+# A block is template when it appears on at least MIN_TEMPLATE_PAGES pages and
+# on TEMPLATE_SHARE of the pages seen for its site. Only short or link-heavy
+# blocks qualify; body copy quoted on a few pages is kept.
+MIN_TEMPLATE_PAGES = 3
+TEMPLATE_SHARE = 0.5
+MAX_TEMPLATE_WORDS = 30
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+class Block:
+    def __init__(self, text, words, link_words, tag, chrome):
+        self.text = text
+        self.words = words
+        self.link_words = link_words
+        self.tag = tag
+        self.chrome = chrome
+        self.fingerprint = hashlib.sha1(text.lower().encode('utf-8')).hexdigest()
+
+    @property
+    def link_density(self):
+        return self.link_words / self.words if self.words else 0
+
+    @property
+    def text_density(self):
+        return self.words / max(1, len(self.text) // LINE_WIDTH)
+
+
+def _is_chrome(element):
+    if element.tag in CHROME_TAGS:
+        return True
+    if (element.get('role') or '').lower() in CHROME_ROLES:
+        return True
+    return bool(CHROME_CLASS_RE.search(f"{element.get('id') or ''} {element.get('class') or ''}"))
+
+
+def _root(html):
+    html = XML_DECLARATION_RE.sub('', decode_html(html))
+    if not html.strip():
+        return None
+    root = lxml.html.document_fromstring(html)
+    lxml.etree.strip_elements(root, *SKIP_TAGS, with_tail=False)
+    lxml.etree.strip_tags(root, lxml.etree.Comment, lxml.etree.ProcessingInstruction)
+    return root
+
+
+def split_blocks(html):
+    # Flattens the page into text blocks: runs of text between block-level tags,
+    # each with its word and link-word counts and whether it sits in page chrome.
+    root = _root(html) if lxml is not None else None
+    if root is None:
+        return []
+    blocks, pieces, tags = [], [], []
+    chrome = content = links = 0
+
+    def flush():
+        text = WHITESPACE_RE.sub(' ', ''.join(text for text, _ in pieces)).strip()
+        if text:
+            words = len(text.split())
+            link_words = sum(len(text.split()) for text, in_link in pieces if in_link)
+            blocks.append(Block(text, words, min(words, link_words), tags[-1] if tags else 'body', chrome > 0 and content == 0))
+        pieces.clear()
+
+    for event, element in lxml.etree.iterwalk(root, events=('start', 'end')):
+        tag = element.tag
+        if event == 'start':
+            if tag in BLOCK_TAGS:
+                flush()
+                tags.append(tag)
+            if tag in CONTENT_TAGS:
+                content += 1
+            if _is_chrome(element):
+                chrome += 1
+            if tag == 'a':
+                links += 1
+            if tag == 'br':
+                pieces.append((' ', False))
+            if element.text:
+                pieces.append((element.text, links > 0))
+        else:
+            if tag == 'a':
+                links -= 1
+            if tag in BLOCK_TAGS:
+                flush()
+                tags.pop()
+            if tag in CONTENT_TAGS:
+                content -= 1
+            if _is_chrome(element):
+                chrome -= 1
+            if element.tail:
+                pieces.append((element.tail, links > 0))
+    flush()
+    return blocks
+
+
+def classify(blocks):
+    # 'good' blocks read like prose, 'bad' ones are chrome or link lists, and
+    # 'short' ones take the class of their surroundings; headings are kept when
+    # the next substantial block is good.
+    classes = []
+    for block in blocks:
+        if block.chrome or block.link_density > MAX_LINK_DENSITY:
+            classes.append('bad')
+        elif block.text_density >= MIN_TEXT_DENSITY:
+            classes.append('good')
+        else:
+            classes.append('short')
+    resolved = list(classes)
+    for i, cls in enumerate(classes):
+        if cls != 'short':
+            continue
+        before = next((c for c in reversed(classes[:i]) if c != 'short'), 'bad')
+        after = next((c for c in classes[i + 1:] if c != 'short'), 'bad')
+        if after == 'good' and (before == 'good' or blocks[i].tag in HEADING_TAGS):
+            resolved[i] = 'good'
+        else:
+            resolved[i] = 'bad'
+    return resolved
+
+
+def content_blocks(html):
+    blocks = split_blocks(html)
+    return [block for block, cls in zip(blocks, classify(blocks)) if cls == 'good']
+
+
+class TemplateDetector:
+    # Counts, per site, how many distinct pages each block appears on. A short
+    # or link-heavy block repeated across much of the site (menus, cookie
+    # notices, footers that slipped past the heuristics) is template and is
+    # dropped.
+    def __init__(self, min_pages=MIN_TEMPLATE_PAGES, share=TEMPLATE_SHARE, max_words=MAX_TEMPLATE_WORDS):
+        self.min_pages = min_pages
+        self.share = share
+        self.max_words = max_words
+        self.counts = defaultdict(Counter)
+        self.site_pages = Counter()
+        self.pages = {}
+        self._seen = set()
+
+    def add(self, url, blocks):
+        key = normalize_url(url)
+        if key in self.pages:
+            return
+        fingerprints = frozenset(block.fingerprint for block in blocks)
+        self.pages[key] = fingerprints
+        # A copy of a page already counted (same blocks under another URL) is not
+        # counted again, so it is not mistaken for template against its twin.
+        if (host_of(url), fingerprints) not in self._seen:
+            self._seen.add((host_of(url), fingerprints))
+            self.counts[host_of(url)].update(fingerprints)
+            self.site_pages[host_of(url)] += 1
+
+    def is_template(self, url, block):
+        if block.words > self.max_words and block.link_density <= MAX_LINK_DENSITY:
+            return False
+        host = host_of(url)
+        threshold = max(self.min_pages, math.ceil(self.share * self.site_pages[host]))
+        return self.counts[host][block.fingerprint] >= threshold
+
+    def filter(self, url, blocks):
+        return [block for block in blocks if not self.is_template(url, block)]
+
+
+def blocks_text(blocks):
+    return '\n'.join(block.text for block in blocks)
+
+
+class MainContentExtractor:
+    # Streaming use: each page is cleaned against the template learned from the
+    # pages before it. For a batch, add every page to a TemplateDetector first.
+    def __init__(self, detector=None):
+        self.detector = detector or TemplateDetector()
+
+    def extract(self, url, html):
+        if lxml is None:
+            return page_text(html)
+        blocks = content_blocks(html)
+        self.detector.add(url, blocks)
+        return blocks_text(self.detector.filter(url, blocks))
@@ -0,0 +1,26 @@
+import json
+import sys
+
+from lexicon import ARTIFACT_PATH, compile_lexicon
+
+
+def main():
+    data = compile_lexicon()
+    if '--check' in sys.argv:
+        try:
+            with open(ARTIFACT_PATH, encoding='utf-8') as f:
+                current = json.load(f)
+        except (OSError, ValueError):
+            current = {}
+        if current.get('version') != data['version'] or current.get('source_hash') != data['source_hash']:
+            print(f"{ARTIFACT_PATH} is out of date, run: python build_lexicon.py")
+            sys.exit(1)
+        print(f"Lexicon {data['version']} is up to date")
+        return
+    with open(ARTIFACT_PATH, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    print(f"Wrote lexicon {data['version']} to {ARTIFACT_PATH}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 import streamlit as st
 import openai
+import rate_limit
 import sys
 import logging
 import random
@@ -107,7 +108,7 @@ def generate_article (content_type, keywords, writing_styles, style_weights, aud
     ])
 
     if emulate_text:
-        grammar_analysis = openai.Completion.create(
+        grammar_analysis = rate_limit.call('openai', openai.Completion.create,
             engine="text-davinci-003",
             prompt=emulate_text,
             max_tokens=1,
@@ -123,7 +124,7 @@ def generate_article (content_type, keywords, writing_styles, style_weights, aud
     else:
         grammar_result = ""  # Add this line to assign an empty string if emulate_text is not provided
 
-    response = openai.ChatCompletion.create(
+    response = rate_limit.call('openai', openai.ChatCompletion.create,
         model="gpt-3.5-turbo",
         messages=messages,
         max_tokens=word_count,
@@ -137,7 +138,7 @@ def generate_article (content_type, keywords, writing_styles, style_weights, aud
     # If the response is incomplete, continue generating until completion
     while response.choices[0].message.content.endswith("..."):
         messages[-1]["content"] = response.choices[0].message.content
-        response = openai.ChatCompletion.create(
+        response = rate_limit.call('openai', openai.ChatCompletion.create,
             model="gpt-3.5-turbo",
             messages=messages,
             max_tokens=word_count * 10 - len(result),  # Adjusted to account for token-to-word conversion
@@ -188,7 +189,7 @@ if st.button("Revise"):
         {"role": "user", "content": pasted_content},
         {"role": "user", "content": revision_requests}
     ]
-    response = openai.ChatCompletion.create(
+    response = rate_limit.call('openai', openai.ChatCompletion.create,
         model="gpt-3.5-turbo",
         messages=messages
     )
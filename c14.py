@@ -1,5 +1,6 @@
 import streamlit as st
 import openai
+import rate_limit
 import sys
 import logging
 import random
@@ -31,7 +32,7 @@ def generate_article(content, writing_styles, style_weights):
         weight = style_weights[i]
         messages.append({"role": "assistant", "content": f"Modify {weight}% of the content in a {style.split(' - ')[1]} manner."})
 
-    response = openai.ChatCompletion.create(model="gpt-3.5-turbo", messages=messages)
+    response = rate_limit.call('openai', openai.ChatCompletion.create, model="gpt-3.5-turbo", messages=messages)
     return response.choices[0].message["content"].strip()
 
 def main():
@@ -62,7 +63,7 @@ def main():
             {"role": "user", "content": pasted_content},
             {"role": "user", "content": revision_requests}
         ]
-        response = openai.ChatCompletion.create(model="gpt-3.5-turbo", messages=revision_messages)
+        response = rate_limit.call('openai', openai.ChatCompletion.create, model="gpt-3.5-turbo", messages=revision_messages)
         revised_content = response.choices[0].message["content"].strip()
         st.text(revised_content)
         st.download_button("Download Revised Content", revised_content, "revised_content_revision.txt")
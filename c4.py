@@ -1,5 +1,6 @@
 import streamlit as st
 import openai
+import rate_limit
 from github import Github
 import os
 import sys
@@ -52,7 +53,7 @@ def generate_article(content_type, keyword, writing_style, audience, institution
         }
         messages.append(emulate_message)
 
-    response = openai.ChatCompletion.create(
+    response = rate_limit.call('openai', openai.ChatCompletion.create,
         model="gpt-3.5-turbo",
         messages=messages,
         max_tokens=word_count
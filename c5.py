@@ -1,5 +1,6 @@
 import streamlit as st
 import openai
+import rate_limit
 from github import Github
 import os
 import sys
@@ -55,7 +56,7 @@ def generate_article(content_type, keyword, writing_style, audience, institution
         }
         messages.append(emulate_message)
 
-    response = openai.ChatCompletion.create(
+    response = rate_limit.call('openai', openai.ChatCompletion.create,
         model="gpt-3.5-turbo",
         messages=messages,
         max_tokens=word_count,
@@ -71,7 +72,7 @@ def generate_article(content_type, keyword, writing_style, audience, institution
     # If the response is incomplete, continue generating until completion
     while response.choices[0].message.content.endswith("..."):
         messages[-1]["content"] = response.choices[0].message.content
-        response = openai.ChatCompletion.create(
+        response = rate_limit.call('openai', openai.ChatCompletion.create,
             model="gpt-3.5-turbo",
             messages=messages,
             max_tokens=word_count - len(result),
@@ -1,5 +1,6 @@
 import streamlit as st
 import openai
+import rate_limit
 from github import Github
 import os
 import sys
@@ -65,7 +66,7 @@ def generate_article(content_type, keywords, writing_styles, style_weights, audi
         }
         messages.append(emulate_message)
 
-    response = openai.ChatCompletion.create(
+    response = rate_limit.call('openai', openai.ChatCompletion.create,
         model="gpt-3.5-turbo",
         messages=messages,
         max_tokens=word_count,
@@ -81,7 +82,7 @@ def generate_article(content_type, keywords, writing_styles, style_weights, audi
     # If the response is incomplete, continue generating until completion
     while response.choices[0].message.content.endswith("..."):
         messages[-1]["content"] = response.choices[0].message.content
-        response = openai.ChatCompletion.create(
+        response = rate_limit.call('openai', openai.ChatCompletion.create,
             model="gpt-3.5-turbo",
             messages=messages,
             max_tokens=word_count - len(result),
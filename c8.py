@@ -1,5 +1,6 @@
 import streamlit as st
 import openai
+import rate_limit
 import sys
 import logging
 import random
@@ -108,7 +109,7 @@ def generate_article(content_type, keywords, writing_styles, style_weights, audi
         messages.append({"role": "system", "content": "emulate"})
         messages.append({"role": "user", "content": emulate})
 
-    response = openai.ChatCompletion.create(
+    response = rate_limit.call('openai', openai.ChatCompletion.create,
         model="gpt-3.5-turbo",
         messages=messages,
         max_tokens=word_count,
@@ -122,7 +123,7 @@ def generate_article(content_type, keywords, writing_styles, style_weights, audi
     # If the response is incomplete, continue generating until completion
     while response.choices[0].message.content.endswith("..."):
         messages[-1]["content"] = response.choices[0].message.content
-        response = openai.ChatCompletion.create(
+        response = rate_limit.call('openai', openai.ChatCompletion.create,
             model="gpt-3.5-turbo",
             messages=messages,
             max_tokens=word_count * 10 - len(result),  # Adjusted to account for token-to-word conversion
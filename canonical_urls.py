@@ -0,0 +1,146 @@
+import posixpath
+import re
+from urllib.parse import quote, unquote, urljoin, urlsplit, urlunsplit
+
+# Query parameters that only track how a visitor arrived; they never change
+# the page, so they are dropped before deduplication and fetching.
+TRACKING_PARAMS = frozenset((
+    'gclid', 'dclid', 'gbraid', 'wbraid', 'fbclid', 'msclkid', 'yclid', 'twclid', 'igshid', 'mc_cid', 'mc_eid',
+    '_ga', '_gl', '_hsenc', '_hsmi', 'hsctatracking', 'mkt_tok', 'ref_src', 'srsltid', 'si',
+))
+TRACKING_PREFIXES = ('utm_', 'pk_', 'mtm_')
+INDEX_PAGES = frozenset(('index.html', 'index.htm', 'index.php', 'default.htm', 'default.html', 'default.aspx'))
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+URL_SPLIT_RE = re.compile(r'[,\s]+')
+HEAD_END_RE = re.compile(r'</head\s*>', re.IGNORECASE)
+MAX_HEAD_CHARS = 200000
+LINK_TAG_RE = re.compile(r'<link\b[^>]*>', re.IGNORECASE)
+ATTRIBUTE_RE = re.compile(r'''([a-zA-Z-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''')
+PERCENT_RE = re.compile(r'%[0-9a-fA-F]{2}')
+UNRESERVED = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~')
+# Characters kept as-is in paths; existing escapes are kept, anything else unsafe is encoded.
+PATH_SAFE = "/:@!$&'()*+,;=-._~%"
+
+
+def _is_tracking(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def _normalize_escape(match):
+    char = chr(int(match.group()[1:], 16))
+    return char if char in UNRESERVED else match.group().upper()
+
+
+def _normalize_path(path):
+    path = quote(PERCENT_RE.sub(_normalize_escape, path), safe=PATH_SAFE) or '/'
+    path = re.sub(r'/{2,}', '/', path)
+    if '/.' in path:
+        trailing = path.endswith('/')
+        path = posixpath.normpath(path)
+        path = path + '/' if trailing and path != '/' else path
+    return path
+
+
+def _normalize_query(query):
+    # Tracking parameters are removed and the rest sorted; values keep their
+    # original encoding.
+    pairs = [pair for pair in query.split('&') if pair and not _is_tracking(unquote(pair.split('=', 1)[0]))]
+    return '&'.join(sorted(pairs))
+
+
+def normalize_url(url):
+    # Lowercases scheme and host and drops default ports, fragments, tracking
+    # parameters, duplicate slashes and dot segments; sorts the query and
+    # normalizes percent-encoding. A missing scheme is taken to be https. The
+    # result is still the URL to fetch.
+    url = url.strip()
+    if not url:
+        return ''
+    if '://' not in url:
+        url = 'https://' + url.lstrip('/')
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower().rstrip('.')
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and DEFAULT_PORTS.get(scheme) != port:
+        host = f"{host}:{port}"
+    return urlunsplit((scheme, host, _normalize_path(parts.path), _normalize_query(parts.query), ''))
+
+
+def page_key(url):
+    # Identity of a page for deduplication: the normalized URL without scheme,
+    # leading www., index page or trailing slash, so those variants collapse.
+    parts = urlsplit(normalize_url(url))
+    host = parts.netloc[4:] if parts.netloc.startswith('www.') else parts.netloc
+    head, tail = posixpath.split(parts.path)
+    path = head if tail.lower() in INDEX_PAGES else parts.path
+    return urlunsplit(('', host, path.rstrip('/') or '/', parts.query, ''))
+
+
+def parse_url_list(text):
+    # Splits pasted URLs on commas, whitespace or newlines and returns each
+    # distinct page once, normalized, in first-seen order. Of http/https twins
+    # the https form is kept.
+    urls = {}
+    for raw in URL_SPLIT_RE.split(text or ''):
+        url = normalize_url(raw)
+        if not url:
+            continue
+        key = page_key(url)
+        if key not in urls or (url.startswith('https:') and not urls[key].startswith('https:')):
+            urls[key] = url
+    return list(urls.values())
+
+
+def canonical_link(html, base_url):
+    if isinstance(html, bytes):
+        html = html.decode('utf-8', errors='replace')
+    end = HEAD_END_RE.search(html)
+    head = html[:end.start()] if end else html[:MAX_HEAD_CHARS]
+    for tag in LINK_TAG_RE.findall(head):
+        attributes = {name.lower(): double or single or bare for name, double, single, bare in ATTRIBUTE_RE.findall(tag)}
+        if 'canonical' in attributes.get('rel', '').lower().split() and attributes.get('href'):
+            return urljoin(base_url, attributes['href'].strip())
+    return None
+
+
+def canonical_url(response, requested_url):
+    # The page's declared canonical (Link header, then <link rel=canonical>),
+    # else the URL it was finally served from after redirects.
+    final_url = getattr(response, 'url', None) or requested_url
+    link = getattr(response, 'links', {}).get('canonical', {}).get('url')
+    if link:
+        link = urljoin(final_url, link)
+    elif 'html' in response.headers.get('Content-Type', 'text/html'):
+        link = canonical_link(response.content, final_url)
+    # Some CMSs point every page's canonical at the home page; ignore that.
+    if link and (urlsplit(link).path.strip('/') or not urlsplit(final_url).path.strip('/')):
+        return normalize_url(link)
+    return normalize_url(final_url)
+
+
+def page_keys(result):
+    # Keys of a fetched page's requested URL, final URL and canonical target.
+    response = result.response
+    keys = {page_key(result.url), page_key(getattr(response, 'url', None) or result.url)}
+    if response.status_code == 200:
+        keys.add(page_key(canonical_url(response, result.url)))
+    return keys
+
+
+def unique_pages(fetch_results, seen=None):
+    # Passes fetch results through, dropping any page whose requested URL,
+    # final URL or canonical target was already yielded in this audit. seen
+    # may be seeded with the page_keys of pages handled in an earlier run.
+    seen = set() if seen is None else seen
+    for result in fetch_results:
+        if result.error is None:
+            keys = page_keys(result)
+            if keys & seen:
+                continue
+            seen |= keys
+        yield result
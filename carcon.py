@@ -1,20 +1,17 @@
 import streamlit as st
-import re
 import plotly.graph_objects as go
-from collections import Counter
 from docx import Document
 from docx.shared import Inches
 import io
 import base64
 import openai
+import rate_limit
+from scoring import score_text, get_automaton
+from sentence_colors import SentenceColorModel
+from lexicon import load_lexicon
 
 def analyze_text(text, color_keywords):
-    text = text.lower()
-    words = re.findall(r'\b\w+\b', text)
-    color_counts = Counter()
-    for color, keywords in color_keywords.items():
-        color_counts[color] = sum(words.count(k.lower()) for k in keywords)
-    return color_counts
+    return score_text(text, color_keywords)
 
 def draw_donut_chart(color_counts):
     labels = list(color_counts.keys())
@@ -37,7 +34,7 @@ def analyze_tone_with_gpt3(text, api_key):
     Text to Analyze:
     {text}
     """
-    response = openai.Completion.create(engine="text-davinci-002", prompt=prompt, max_tokens=100)
+    response = rate_limit.call('openai', openai.Completion.create, cache=True, engine="text-davinci-002", prompt=prompt, max_tokens=100)
     gpt3_output = response.choices[0].text.strip().split('\n')
     tone_scores = {}
     for line in gpt3_output:
@@ -68,6 +65,9 @@ def get_word_file_download_link(file_path, filename):
     href = f'<a href="data:application/vnd.openxmlformats-officedocument.wordprocessingml.document;base64,{b64_file}" download="{filename}">Download Word Report</a>'
     return href
 
+def on_sentence_colors_change(sentence_model, sentence_id):
+    sentence_model.set_colors(sentence_id, st.session_state[sentence_model.widget_key(sentence_id)])
+
 def main():
     st.title('Color Personality Analysis')
     if "OPENAI_API_KEY" not in st.secrets:
@@ -75,51 +75,32 @@ def main():
         return
     openai_api_key = st.secrets["OPENAI_API_KEY"]
     
-    if 'sentence_to_colors' not in st.session_state:
-        st.session_state.sentence_to_colors = {}
+    if 'sentence_model' not in st.session_state:
+        st.session_state.sentence_model = None
         
-    color_keywords = {
-        'Red': ['Activate', 'Animate', 'Amuse', 'Captivate', 'Cheer', 'Delight', 'Encourage', 'Energize', 'Engage', 'Enjoy', 'Enliven', 'Entertain', 'Excite', 'Express', 'Inspire', 'Joke', 'Motivate', 'Play', 'Stir', 'Uplift', 'Amusing', 'Clever', 'Comedic', 'Dynamic', 'Energetic', 'Engaging', 'Enjoyable', 'Entertaining', 'Enthusiastic', 'Exciting', 'Expressive', 'Extroverted', 'Fun', 'Humorous', 'Interesting', 'Lively', 'Motivational', 'Passionate', 'Playful', 'Spirited'],
-        'Silver': ['Activate', 'Campaign', 'Challenge', 'Commit', 'Confront', 'Dare', 'Defy', 'Disrupting', 'Drive', 'Excite', 'Face', 'Ignite', 'Incite', 'Influence', 'Inspire', 'Inspirit', 'Motivate', 'Move', 'Push', 'Rebel', 'Reimagine', 'Revolutionize', 'Rise', 'Spark', 'Stir', 'Fight', 'Free', 'Aggressive', 'Bold', 'Brazen', 'Committed', 'Courageous', 'Daring', 'Disruptive', 'Driven', 'Fearless', 'Free', 'Gutsy', 'Independent', 'Inspired', 'Motivated', 'Rebellious', 'Revolutionary', 'Unafraid', 'Unconventional'],
-        'Blue': ['Accomplish', 'Achieve', 'Affect', 'Assert', 'Cause', 'Command', 'Determine', 'Direct', 'Dominate', 'Drive', 'Empower', 'Establish', 'Guide', 'Impact', 'Impress', 'Influence', 'Inspire', 'Lead', 'Outpace', 'Outshine', 'Realize', 'Shape', 'Succeed', 'Transform', 'Win', 'Accomplished', 'Assertive', 'Authoritative', 'Commanding', 'Confident', 'Decisive', 'Distinguished', 'Dominant', 'Elite', 'Eminent', 'Established', 'Exceptional', 'Expert', 'First-class', 'First-rate', 'Impressive', 'Influential', 'Leading', 'Magnetic', 'Managerial', 'Masterful', 'Noble', 'Premier', 'Prestigious', 'Prominent', 'Proud', 'Strong'],
-        'Yellow': ['Accelerate', 'Advance', 'Change', 'Conceive', 'Create', 'Engineer', 'Envision', 'Experiment', 'Dream', 'Ignite', 'Illuminate', 'Imagine', 'Innovate', 'Inspire', 'Invent', 'Pioneer', 'Progress', 'Shape', 'Spark', 'Solve', 'Transform', 'Unleash', 'Unlock', 'Advanced', 'Brilliant', 'Conceptual', 'Enterprising', 'Expert', 'Extraordinary', 'Forward-looking', 'Forward-thinking', 'Fresh', 'Future-minded', 'Future-thinking', 'Ingenious', 'Intelligent', 'Inventive', 'Leading-edge', 'Luminous', 'New', 'Pioneering', 'Reforming', 'Rising', 'Transformative', 'Visionary', 'World-changing', 'World-class'],
-        'Green': ['Analyze', 'Discover', 'Examine', 'Expand', 'Explore', 'Extend', 'Inquire', 'Journey', 'Launch', 'Move', 'Pioneer', 'Pursue', 'Question', 'Reach', 'Search', 'Uncover', 'Venture', 'Wonder', 'Adventurous', 'Analytical', 'Curious', 'Discerning', 'Experiential', 'Exploratory', 'Fearless', 'Inquisitive', 'Intriguing', 'Investigative', 'Journeying', 'Mysterious', 'Philosophical', 'Pioneering', 'Questioning', 'Unbound', 'Unexpected'],
-        'Purple': ['Accommodate', 'Assist', 'Befriend', 'Care', 'Collaborate', 'Connect', 'Embrace', 'Empower', 'Encourage', 'Foster', 'Give', 'Help', 'Nourish', 'Nurture', 'Promote', 'Protect', 'Provide', 'Serve', 'Share', 'Shepherd', 'Steward', 'Tend', 'Uplift', 'Value', 'Welcome', 'Affectionate', 'Attentive', 'Beneficial', 'Benevolent', 'Big-hearted', 'Caring', 'Charitable', 'Compassionate', 'Considerate', 'Encouraging', 'Friendly', 'Generous', 'Gentle', 'Helpful', 'Hospitable', 'Inclusive', 'Kind-hearted', 'Merciful', 'Missional', 'Neighborly', 'Nurturing', 'Protective', 'Responsible', 'Selfless', 'Supportive', 'Sympathetic', 'Thoughtful', 'Uplifting', 'Vocational', 'Warm'],
-        'Maroon': ['Accomplish', 'Achieve', 'Build', 'Challenge', 'Commit', 'Compete', 'Contend', 'Dedicate', 'Defend', 'Devote', 'Drive', 'Endeavor', 'Entrust', 'Endure', 'Fight', 'Grapple', 'Grow', 'Improve', 'Increase', 'Overcome', 'Persevere', 'Persist', 'Press on', 'Pursue', 'Resolve', 'Tackle', 'Ambitious', 'Brave', 'Committed', 'Competitive', 'Consistent', 'Constant', 'Continuous', 'Courageous', 'Dedicated', 'Determined', 'Earnest', 'Industrious', 'Loyal', 'Persevering', 'Persistent', 'Proud', 'Purposeful', 'Relentless', 'Reliable', 'Resilient', 'Resolute', 'Steadfast', 'Strong', 'Tenacious', 'Tireless', 'Tough'],
-        'Orange': ['Compose', 'Conceptualize', 'Conceive', 'Craft', 'Create', 'Design', 'Dream', 'Envision', 'Express', 'Fashion', 'Form', 'Imagine', 'Interpret', 'Make', 'Originate', 'Paint', 'Perform', 'Portray', 'Realize', 'Shape', 'Abstract', 'Artistic', 'Avant-garde', 'Colorful', 'Conceptual', 'Contemporary', 'Creative', 'Decorative', 'Eccentric', 'Eclectic', 'Evocative', 'Expressive', 'Imaginative', 'Interpretive', 'Offbeat', 'One-of-a-kind', 'Original', 'Uncommon', 'Unconventional', 'Unexpected', 'Unique', 'Vibrant', 'Whimsical'],
-        'Pink': ['Arise', 'Aspire', 'Detail', 'Dream', 'Elevate', 'Enchant', 'Enrich', 'Envision', 'Exceed', 'Excel', 'Experience', 'Improve', 'Idealize', 'Imagine', 'Inspire', 'Perfect', 'Poise', 'Polish', 'Prepare', 'Refine', 'Uplift', 'Affectionate', 'Admirable', 'Age-less', 'Beautiful', 'Classic', 'Desirable', 'Detailed', 'Dreamy', 'Elegant', 'Enchanting', 'Enriching', 'Ethereal', 'Excellent', 'Exceptional', 'Experiential', 'Exquisite', 'Glamorous', 'Graceful', 'Idealistic', 'Inspiring', 'Lofty', 'Mysterious', 'Ordered', 'Perfect', 'Poised', 'Polished', 'Pristine', 'Pure', 'Refined', 'Romantic', 'Sophisticated', 'Spiritual', 'Timeless', 'Traditional', 'Virtuous', 'Visionary']
-    }
+    color_keywords = load_lexicon().color_keywords
     user_content = st.text_area('Paste your content here:')
 
     if st.button('Analyze'):
-        st.session_state.sentence_to_colors = {}
-        
         color_counts = analyze_text(user_content, color_keywords)
         initial_fig = draw_donut_chart(color_counts)
         st.subheader('Initial Donut Chart')
         st.plotly_chart(initial_fig)
         
-        sentences = re.split(r'[.!?]', user_content)
-        for sentence in sentences:
-            if not sentence.strip():
-                continue
-            initial_colors = []
-            for color, keywords in color_keywords.items():
-                if any(keyword.lower() in sentence.lower() for keyword in keywords):
-                    initial_colors.append(color)
-            st.session_state.sentence_to_colors[sentence] = initial_colors
+        st.session_state.sentence_model = SentenceColorModel.from_text(user_content, get_automaton(color_keywords))
             
-    if st.session_state.sentence_to_colors:
-        updated_color_counts = Counter()
-        for sentence, initial_colors in st.session_state.sentence_to_colors.items():
-            selected_colors = st.multiselect(
-                f"{sentence}. [{', '.join(initial_colors)}]",
+    sentence_model = st.session_state.sentence_model
+    if sentence_model and sentence_model.sentences:
+        for sentence_id, sentence in enumerate(sentence_model.sentences):
+            st.multiselect(
+                f"{sentence}. [{', '.join(sentence_model.initial_colors[sentence_id])}]",
                 list(color_keywords.keys()),
-                default=initial_colors
+                default=sentence_model.selected[sentence_id],
+                key=sentence_model.widget_key(sentence_id),
+                on_change=on_sentence_colors_change,
+                args=(sentence_model, sentence_id)
             )
-            st.session_state.sentence_to_colors[sentence] = selected_colors
-            for color in selected_colors:
-                updated_color_counts[color] += 1
+        updated_color_counts = sentence_model.color_counts
                 
         updated_fig = draw_donut_chart(updated_color_counts)
         st.subheader('Updated Donut Chart based on User Reassignments')
@@ -1,5 +1,4 @@
 import streamlit as st
-import re
 import plotly.graph_objects as go
 from collections import Counter
 from docx import Document
@@ -7,14 +6,13 @@ from docx.shared import Inches
 import io
 import base64
 import openai
+import rate_limit
+from scoring import score_text, get_automaton
+from sentence_colors import SentenceColorModel
+from lexicon import load_lexicon
 
 def analyze_text(text, color_keywords):
-    text = text.lower()
-    words = re.findall(r'\b\w+\b', text)
-    color_counts = Counter()
-    for color, keywords in color_keywords.items():
-        color_counts[color] = sum(words.count(k.lower()) for k in keywords)
-    return color_counts
+    return score_text(text, color_keywords)
 
 def draw_donut_chart(color_counts):
     labels = list(color_counts.keys())
@@ -37,7 +35,7 @@ def analyze_tone_with_gpt3(text, api_key):
     Text to Analyze:
     {text}
     """
-    response = openai.ChatCompletion.create(model="gpt-3.5-turbo", messages=[{"role": "system", "content": "Analyze tone."}, {"role": "user", "content": text}])
+    response = rate_limit.call('openai', openai.ChatCompletion.create, cache=True, model="gpt-3.5-turbo", messages=[{"role": "system", "content": "Analyze tone."}, {"role": "user", "content": text}])
     gpt3_output = response['choices'][0]['message']['content'].strip().split('\n')
     tone_scores = {}
     for line in gpt3_output:
@@ -74,7 +72,8 @@ def generate_word_doc(color_counts, user_content, tone_scores, initial_fig, tone
         doc.add_paragraph(f"{tone}: {score}")
     
     doc.add_heading('Scored Sentences:', level=1)
-    for sentence, colors in st.session_state.sentence_to_colors.items():
+    sentence_model = st.session_state.sentence_model
+    for sentence, colors in zip(sentence_model.sentences, sentence_model.initial_colors):
         doc.add_paragraph(f"{sentence}: {', '.join(colors)}")
     
     doc.add_heading('Original Text:', level=1)
@@ -90,6 +89,9 @@ def get_word_file_download_link(file_path, filename):
     href = f'<a href="data:application/vnd.openxmlformats-officedocument.wordprocessingml.document;base64,{b64_file}" download="{filename}">Download Word Report</a>'
     return href
 
+def on_sentence_colors_change(sentence_model, sentence_id):
+    sentence_model.set_colors(sentence_id, st.session_state[sentence_model.widget_key(sentence_id)])
+
 def main():
     st.title('Color Personality Analysis')
     openai_api_key = st.secrets["OPENAI_API_KEY"]
@@ -97,20 +99,9 @@ def main():
     if 'init_done' not in st.session_state:
         st.session_state.init_done = False
         st.session_state.tone_scores = {}
-        st.session_state.sentence_to_colors = {}
-        st.session_state.updated_color_counts = Counter()
+        st.session_state.sentence_model = None
 
-    color_keywords = {
-        'Red': ['Activate', 'Animate', 'Amuse', 'Captivate', 'Cheer', 'Delight', 'Encourage', 'Energize', 'Engage', 'Enjoy', 'Enliven', 'Entertain', 'Excite', 'Express', 'Inspire', 'Joke', 'Motivate', 'Play', 'Stir', 'Uplift', 'Amusing', 'Clever', 'Comedic', 'Dynamic', 'Energetic', 'Engaging', 'Enjoyable', 'Entertaining', 'Enthusiastic', 'Exciting', 'Expressive', 'Extroverted', 'Fun', 'Humorous', 'Interesting', 'Lively', 'Motivational', 'Passionate', 'Playful', 'Spirited'],
-        'Silver': ['Activate', 'Campaign', 'Challenge', 'Commit', 'Confront', 'Dare', 'Defy', 'Disrupting', 'Drive', 'Excite', 'Face', 'Ignite', 'Incite', 'Influence', 'Inspire', 'Inspirit', 'Motivate', 'Move', 'Push', 'Rebel', 'Reimagine', 'Revolutionize', 'Rise', 'Spark', 'Stir', 'Fight', 'Free', 'Aggressive', 'Bold', 'Brazen', 'Committed', 'Courageous', 'Daring', 'Disruptive', 'Driven', 'Fearless', 'Free', 'Gutsy', 'Independent', 'Inspired', 'Motivated', 'Rebellious', 'Revolutionary', 'Unafraid', 'Unconventional'],
-        'Blue': ['Accomplish', 'Achieve', 'Affect', 'Assert', 'Cause', 'Command', 'Determine', 'Direct', 'Dominate', 'Drive', 'Empower', 'Establish', 'Guide', 'Impact', 'Impress', 'Influence', 'Inspire', 'Lead', 'Outpace', 'Outshine', 'Realize', 'Shape', 'Succeed', 'Transform', 'Win', 'Accomplished', 'Assertive', 'Authoritative', 'Commanding', 'Confident', 'Decisive', 'Distinguished', 'Dominant', 'Elite', 'Eminent', 'Established', 'Exceptional', 'Expert', 'First-class', 'First-rate', 'Impressive', 'Influential', 'Leading', 'Magnetic', 'Managerial', 'Masterful', 'Noble', 'Premier', 'Prestigious', 'Prominent', 'Proud', 'Strong'],
-        'Yellow': ['Accelerate', 'Advance', 'Change', 'Conceive', 'Create', 'Engineer', 'Envision', 'Experiment', 'Dream', 'Ignite', 'Illuminate', 'Imagine', 'Innovate', 'Inspire', 'Invent', 'Pioneer', 'Progress', 'Shape', 'Spark', 'Solve', 'Transform', 'Unleash', 'Unlock', 'Advanced', 'Brilliant', 'Conceptual', 'Enterprising', 'Expert', 'Extraordinary', 'Forward-looking', 'Forward-thinking', 'Fresh', 'Future-minded', 'Future-thinking', 'Ingenious', 'Intelligent', 'Inventive', 'Leading-edge', 'Luminous', 'New', 'Pioneering', 'Reforming', 'Rising', 'Transformative', 'Visionary', 'World-changing', 'World-class'],
-        'Green': ['Analyze', 'Discover', 'Examine', 'Expand', 'Explore', 'Extend', 'Inquire', 'Journey', 'Launch', 'Move', 'Pioneer', 'Pursue', 'Question', 'Reach', 'Search', 'Uncover', 'Venture', 'Wonder', 'Adventurous', 'Analytical', 'Curious', 'Discerning', 'Experiential', 'Exploratory', 'Fearless', 'Inquisitive', 'Intriguing', 'Investigative', 'Journeying', 'Mysterious', 'Philosophical', 'Pioneering', 'Questioning', 'Unbound', 'Unexpected'],
-        'Purple': ['Accommodate', 'Assist', 'Befriend', 'Care', 'Collaborate', 'Connect', 'Embrace', 'Empower', 'Encourage', 'Foster', 'Give', 'Help', 'Nourish', 'Nurture', 'Promote', 'Protect', 'Provide', 'Serve', 'Share', 'Shepherd', 'Steward', 'Tend', 'Uplift', 'Value', 'Welcome', 'Affectionate', 'Attentive', 'Beneficial', 'Benevolent', 'Big-hearted', 'Caring', 'Charitable', 'Compassionate', 'Considerate', 'Encouraging', 'Friendly', 'Generous', 'Gentle', 'Helpful', 'Hospitable', 'Inclusive', 'Kind-hearted', 'Merciful', 'Missional', 'Neighborly', 'Nurturing', 'Protective', 'Responsible', 'Selfless', 'Supportive', 'Sympathetic', 'Thoughtful', 'Uplifting', 'Vocational', 'Warm'],
-        'Maroon': ['Accomplish', 'Achieve', 'Build', 'Challenge', 'Commit', 'Compete', 'Contend', 'Dedicate', 'Defend', 'Devote', 'Drive', 'Endeavor', 'Entrust', 'Endure', 'Fight', 'Grapple', 'Grow', 'Improve', 'Increase', 'Overcome', 'Persevere', 'Persist', 'Press on', 'Pursue', 'Resolve', 'Tackle', 'Ambitious', 'Brave', 'Committed', 'Competitive', 'Consistent', 'Constant', 'Continuous', 'Courageous', 'Dedicated', 'Determined', 'Earnest', 'Industrious', 'Loyal', 'Persevering', 'Persistent', 'Proud', 'Purposeful', 'Relentless', 'Reliable', 'Resilient', 'Resolute', 'Steadfast', 'Strong', 'Tenacious', 'Tireless', 'Tough'],
-        'Orange': ['Compose', 'Conceptualize', 'Conceive', 'Craft', 'Create', 'Design', 'Dream', 'Envision', 'Express', 'Fashion', 'Form', 'Imagine', 'Interpret', 'Make', 'Originate', 'Paint', 'Perform', 'Portray', 'Realize', 'Shape', 'Abstract', 'Artistic', 'Avant-garde', 'Colorful', 'Conceptual', 'Contemporary', 'Creative', 'Decorative', 'Eccentric', 'Eclectic', 'Evocative', 'Expressive', 'Imaginative', 'Interpretive', 'Offbeat', 'One-of-a-kind', 'Original', 'Uncommon', 'Unconventional', 'Unexpected', 'Unique', 'Vibrant', 'Whimsical'],
-        'Pink': ['Arise', 'Aspire', 'Detail', 'Dream', 'Elevate', 'Enchant', 'Enrich', 'Envision', 'Exceed', 'Excel', 'Experience', 'Improve', 'Idealize', 'Imagine', 'Inspire', 'Perfect', 'Poise', 'Polish', 'Prepare', 'Refine', 'Uplift', 'Affectionate', 'Admirable', 'Age-less', 'Beautiful', 'Classic', 'Desirable', 'Detailed', 'Dreamy', 'Elegant', 'Enchanting', 'Enriching', 'Ethereal', 'Excellent', 'Exceptional', 'Experiential', 'Exquisite', 'Glamorous', 'Graceful', 'Idealistic', 'Inspiring', 'Lofty', 'Mysterious', 'Ordered', 'Perfect', 'Poised', 'Polished', 'Pristine', 'Pure', 'Refined', 'Romantic', 'Sophisticated', 'Spiritual', 'Timeless', 'Traditional', 'Virtuous', 'Visionary']
-    }
+    color_keywords = load_lexicon().color_keywords
     
     user_content = st.text_area('Paste your content here:')
     color_counts = Counter()
@@ -119,19 +110,14 @@ def main():
     if st.button('Analyze'):
         st.session_state.init_done = True
         color_counts = analyze_text(user_content, color_keywords)
-        st.session_state.updated_color_counts = color_counts.copy()
         st.session_state.initial_fig = draw_donut_chart(color_counts)
         st.subheader('Initial Donut Chart')
         st.plotly_chart(st.session_state.initial_fig)
         st.session_state.tone_scores = analyze_tone_with_gpt3(user_content, openai_api_key)
-        
-        sentences = re.split(r'[.!?]', user_content)
-        st.session_state.sentence_to_colors = {}
-        
-        for sentence in sentences:
-            if sentence.strip():
-                initial_colors = [color for color, keywords in color_keywords.items() if any(keyword.lower() in sentence.lower() for keyword in keywords)]
-                st.session_state.sentence_to_colors[sentence] = initial_colors
+        # Reassigned sentences add to the keyword counts rather than replacing them.
+        st.session_state.sentence_model = SentenceColorModel.from_text(
+            user_content, get_automaton(color_keywords), base_counts=color_counts, select_initial=False
+        )
                 
     if st.session_state.init_done:
         if st.session_state.tone_scores:
@@ -141,19 +127,21 @@ def main():
             st.subheader('Tone Analysis')
             st.plotly_chart(tone_fig)
 
-        new_color_counts = st.session_state.updated_color_counts.copy()
-        
-        for sentence, initial_colors in st.session_state.sentence_to_colors.items():
-            selected_colors = st.multiselect(f"{sentence}. ({', '.join(initial_colors)})", list(color_keywords.keys()))
-            for color in selected_colors:
-                new_color_counts[color] += 1
+        sentence_model = st.session_state.sentence_model
+        for sentence_id, sentence in enumerate(sentence_model.sentences):
+            st.multiselect(
+                f"{sentence}. ({', '.join(sentence_model.initial_colors[sentence_id])})",
+                list(color_keywords.keys()),
+                key=sentence_model.widget_key(sentence_id),
+                on_change=on_sentence_colors_change,
+                args=(sentence_model, sentence_id)
+            )
         
-        st.session_state.updated_color_counts = new_color_counts
-        updated_fig = draw_donut_chart(st.session_state.updated_color_counts)
+        updated_fig = draw_donut_chart(sentence_model.color_counts)
         st.subheader('Updated Donut Chart')
         st.plotly_chart(updated_fig)
         
-        word_file_path = generate_word_doc(st.session_state.updated_color_counts, user_content, st.session_state.tone_scores, st.session_state.initial_fig, tone_fig, updated_fig)
+        word_file_path = generate_word_doc(sentence_model.color_counts, user_content, st.session_state.tone_scores, st.session_state.initial_fig, tone_fig, updated_fig)
         download_link = get_word_file_download_link(word_file_path, "Color_Personality_Analysis_Report.docx")
         st.markdown(download_link, unsafe_allow_html=True)
 
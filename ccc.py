@@ -1,5 +1,6 @@
 import streamlit as st
 import openai
+import rate_limit
 from github import Github
 import os
 import sys
@@ -21,7 +22,7 @@ st.title("Carnegie Content Creator")
 
 def generate_article(keyword, writing_style, institution, word_count):
     #return "This is a test article generated without making API calls."
-    response = openai.ChatCompletion.create(
+    response = rate_limit.call('openai', openai.ChatCompletion.create,
         model="gpt-3.5-turbo",
         messages=[
                 {"role": "user", "content": "Write a SEO optimized word article about " + keyword},
@@ -1,9 +1,21 @@
 import streamlit as st
 import openai
-import requests
+import http_client
 from collections import Counter, defaultdict
-from bs4 import BeautifulSoup
 from streamlit_oauth import OAuth2Component
+from lexicon import load_lexicon
+from fetching import fetch_all
+from canonical_urls import parse_url_list, unique_pages
+import rate_limit
+from boilerplate import MainContentExtractor
+from page_cache import memoize
+from block_memo import analyze_blocks
+from near_duplicates import SharedAnalysis
+
+# Cached analyses are keyed by model, prompt version and lexicon version;
+# bump PROMPT_VERSION whenever the analysis prompt changes.
+ANALYSIS_MODEL = "gpt-3.5-turbo"
+PROMPT_VERSION = 1
 
 # Load Google Auth credentials from Streamlit secrets
 google_auth = {
@@ -33,7 +45,7 @@ def fetch_user_info(token):
     headers = {
         "Authorization": f"Bearer {token['access_token']}"
     }
-    response = requests.get(user_info_endpoint, headers=headers)
+    response = http_client.get(user_info_endpoint, headers=headers)
     if response.status_code == 200:
         return response.json()
     else:
@@ -63,47 +75,7 @@ else:
     openai.api_key = st.secrets["OPENAI_API_KEY"]
 
     # Define your color-based personas
-    placeholders = {
-        "Purple - caring, encouraging": {"verbs": ["assist", "befriend", "care", "collaborate", "connect", "embrace", "empower", "encourage", "foster", "give", "help", "nourish", "nurture", "promote", "protect", "provide", "serve", "share", "shepherd", "steward", "tend", "uplift", "value", "welcome"], "adjectives": ["caring", "encouraging", "attentive", "compassionate", "empathetic", "generous", "hospitable", "nurturing", "protective", "selfless", "supportive", "welcoming"], 
-         "beliefs": ['Believe people should be cared for and encouraged', 'Desire to make others feel safe and supported', 'Have a strong desire to mend and heal', 'Become loyal teammates and trusted allies', 'Are put off by aggression and selfish motivations']},
-        "Green - adventurous, curious": {"verbs": ["analyze", "discover", "examine", "expand", "explore", "extend", "inquire", "journey", "launch", "move", "pioneer", "pursue", "question", "reach", "search", "uncover", "venture", "wonder"], "adjectives": ["adventurous", "curious", "discerning", "examining", "experiential", "exploratory", "inquisitive", "investigative", "intrepid", "philosophical"], 
-         "beliefs": ['The noblest pursuit is the quest for new knowledge', 'Continually inquiring and examining everything', 'Have an insatiable thirst for progress and discovery', 'Cannot sit still or accept present realities', 'Curiosity and possibility underpin their actions']},
-        "Maroon - gritty, determined": {"verbs": ["accomplish", "achieve", "build", "challenge", "commit", "compete", "contend", "dedicate", "defend", "devote", "drive", "endeavor", "entrust", "endure", "fight", "grapple", "grow", "improve", "increase", "overcome", "persevere", "persist", "press on", "pursue", "resolve"], "adjectives": ["competitive", "determined", "gritty", "industrious", "persevering", "relentless", "resilient", "tenacious", "tough", "unwavering"], 
-         "beliefs": ['Value extreme and hard work', 'Gritty and strong, they’re determined to overcome', 'Have no tolerance for laziness or inability', 'Highly competitive and intent on proving prowess', 'Will not be outpaced or outworked']},
-        "Orange - artistic, creative": {"verbs": ["compose", "conceptualize", "conceive", "craft", "create", "design", "dream", "envision", "express", "fashion", "form", "imagine", "interpret", "make", "originate", "paint", "perform", "portray", "realize", "shape"], "adjectives": ["artistic", "conceptual", "creative", "eclectic", "expressive", "imaginative", "interpretive", "novel", "original", "whimsical"], 
-         "beliefs": ['Intensely expressive', 'Communicate in diverse ways', 'A lack of imagination and rigidity may feel oppressive', 'Constructive, conceptual, and adept storytellers', 'Manifesting new and creative concepts is their end goal']},
-        "Yellow - innovative, intelligent": {"verbs": ["accelerate", "advance", "change", "conceive", "create", "engineer", "envision", "experiment", "dream", "ignite", "illuminate", "imagine", "innovate", "inspire", "invent", "pioneer", "progress", "shape", "spark", "solve", "transform", "unleash", "unlock"], "adjectives": ["advanced", "analytical", "brilliant", "experimental", "forward-thinking", "innovative", "intelligent", "inventive", "leading-edge", "visionary"], 
-         "beliefs": ['Thrive on new concepts and experimentation', 'Live to make things newer and better', 'Work well in ambiguity or unknowns', 'Feel stifled by established processes and the status quo', 'See endless possibilities and opportunities to invent']},
-        "Red - entertaining, humorous": {"verbs": ["animate", "amuse", "captivate", "cheer", "delight", "encourage", "energize", "engage", "enjoy", "enliven", "entertain", "excite", "express", "inspire", "joke", "motivate", "play", "stir", "uplift"], "adjectives": ["dynamic", "energetic", "engaging", "entertaining", "enthusiastic", "exciting", "fun", "lively", "magnetic", "playful", "humorous"], 
-         "beliefs": ['Energetic and uplifting', 'Motivated to entertain and create excitement', 'Magnetic and able to rally support for new concepts', 'Often naturally talented presenters and speakers', 'Sensitive to the mood and condition of others']},
-        "Blue - confident, influential": {"verbs": ["accomplish", "achieve", "affect", "assert", "cause", "command", "determine", "direct", "dominate", "drive", "empower", "establish", "guide", "impact", "impress", "influence", "inspire", "lead", "outpace", "outshine", "realize", "shape", "succeed", "transform", "win"], "adjectives": ["accomplished", "assertive", "confident", "decisive", "elite", "influential", "powerful", "prominent", "proven", "strong"], 
-         "beliefs": ['Achievement is paramount', 'Highly tolerant of risk and stress', 'Seeks influence and accomplishments', 'Comfortable making decisions with incomplete information', 'Set strategic visions and lead the way']},
-        "Pink - charming, elegant": {"verbs": ["arise", "aspire", "detail", "dream", "elevate", "enchant", "enrich", "envision", "exceed", "excel", "experience", "improve", "idealize", "imagine", "inspire", "perfect", "poise", "polish", "prepare", "refine", "uplift"], "adjectives": ["aesthetic", "charming", "classic", "dignified", "idealistic", "meticulous", "poised", "polished", "refined", "sophisticated", "elegant"], 
-         "beliefs": ['Hold high regard for tradition and excellence', 'Dream up and pursue refinement, beauty, and vitality', 'Typically highly detailed and very observant', 'Mess and disorder only deflates their enthusiasm']},
-        "Silver - rebellious, daring": {"verbs": ["activate", "campaign", "challenge", "commit", "confront", "dare", "defy", "disrupting", "drive", "excite", "face", "ignite", "incite", "influence", "inspire", "inspirit", "motivate", "move", "push", "rebel", "reimagine", "revolutionize", "rise", "spark", "stir", "fight", "free"], "adjectives": ["bold", "daring", "fearless", "independent", "non-conformist", "radical", "rebellious", "resolute", "unconventional", "valiant"], 
-         "beliefs": ['Rule breakers and establishment challengers', 'Have a low need to fit in with the pack', 'Value unconventional and independent thinking', 'Value freedom, boldness, and defiant ideas', 'Feel stifled by red tape and bureaucratic systems']},
-        "Beige - dedicated, humble": {"verbs": ["dedicate", "humble", "collaborate", "empower", "inspire", "empassion", "transform"], "adjectives": ["dedicated", "collaborative", "consistent", "empowering", "enterprising", "humble", "inspiring", "passionate", "proud", "traditional", "transformative"], 
-         "beliefs": ['There’s no need to differentiate from others', 'All perspectives are equally worth holding', 'Will not risk offending anyone', 'Light opinions are held quite loosely', 'Information tells enough of a story']},
-    }
-
-    def chunk_text(text, max_tokens=3000):
-        words = text.split()
-        chunks = []
-        current_chunk = []
-        current_length = 0
-
-        for word in words:
-            if current_length + len(word) + 1 > max_tokens:
-                chunks.append(" ".join(current_chunk))
-                current_chunk = []
-                current_length = 0
-            current_chunk.append(word)
-            current_length += len(word) + 1
-
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
-
-        return chunks
+    placeholders = load_lexicon().placeholders
 
     def analyze_text(text):
         summarized_placeholders = {
@@ -114,18 +86,17 @@ else:
         }
         prompt_base = f"Please analyze the following text and identify which verbs and adjectives from the following categories are present. Also, explain how these relate to the predefined beliefs of each category:\n\nCategories:\n" + "\n".join([f"{color}: Verbs({info['verbs']}), Adjectives({info['adjectives']})" for color, info in summarized_placeholders.items()]) + "\n\nText: "
 
-        text_chunks = chunk_text(text)
-        all_responses = []
-
-        for chunk in text_chunks:
-            prompt_text = prompt_base + chunk
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt_text}],
+        def analyze_chunk(chunk):
+            response = rate_limit.call('openai', openai.ChatCompletion.create, cache=True,
+                model=ANALYSIS_MODEL,
+                messages=[{"role": "user", "content": prompt_base + chunk}],
                 max_tokens=500
             )
-            raw_content = response.choices[0]['message']['content'].strip()
-            all_responses.append(raw_content)
+            return response.choices[0]['message']['content'].strip()
+
+        # Paragraph chunks are analyzed once per distinct text, so re-auditing an
+        # edited page only sends the chunks that changed.
+        all_responses = analyze_blocks(f"chemanalyzerevise-chunk-{ANALYSIS_MODEL}", prompt_base, text, analyze_chunk)
 
         return "\n".join(all_responses)
 
@@ -162,7 +133,7 @@ else:
             {"role": "user", "content": full_prompt}
         ]
 
-        response = openai.ChatCompletion.create(
+        response = rate_limit.call('openai', openai.ChatCompletion.create,
             model="gpt-3.5-turbo",
             messages=messages
         )
@@ -180,25 +151,29 @@ else:
     st.markdown(hide_toolbar_css, unsafe_allow_html=True)
 
     url_input = st.text_area("Paste comma-separated URLs here:", height=100)
-    urls = [url.strip() for url in url_input.split(',')]
+    urls = parse_url_list(url_input)
 
     if 'analyses' not in st.session_state:
         st.session_state.analyses = {}
 
     if st.button("Analyze URLs"):
-        for url in urls:
+        extractor = MainContentExtractor()
+        shared = SharedAnalysis()
+        for result in unique_pages(fetch_all(urls)):
+            url = result.url
             try:
-                response = requests.get(url)
-                soup = BeautifulSoup(response.text, "html.parser")
-                content = soup.get_text()
+                response = result.get()
+                content = extractor.extract(url, response.text)
 
-                raw_analysis = analyze_text(content)
+                # Near-identical pages share the first one's analysis instead of a new LLM call.
+                raw_analysis, duplicate_of = shared.run(url, content, lambda: memoize(f"chemanalyzerevise-analysis-{ANALYSIS_MODEL}-p{PROMPT_VERSION}-{load_lexicon().version}", content, lambda: analyze_text(content)))
                 top_colors = match_text_to_color(raw_analysis)
 
                 analysis_result = {
                     "content": content,
                     "raw_analysis": raw_analysis,
-                    "top_colors": top_colors
+                    "top_colors": top_colors,
+                    "duplicate_of": duplicate_of
                 }
 
                 st.session_state.analyses[url] = analysis_result
@@ -213,6 +188,8 @@ else:
         st.download_button(f"Download Content from {url}", analysis["content"], f"content_{url.split('//')[-1].replace('/', '_')}.txt")
 
         st.write(f"Analysis for URL: {url}")
+        if analysis.get("duplicate_of"):
+            st.write(f"*Near-duplicate of {analysis['duplicate_of']}; analysis shared.*")
         for color, score in analysis["top_colors"]:
             st.write(f"**{color}** - Score: {score}")
             st.write("Reasons:")
@@ -253,7 +230,7 @@ else:
             {"role": "system", "content": "You are a helpful assistant."},
             {"role": "user", "content": revision_prompt}
         ]
-        response = openai.ChatCompletion.create(model="gpt-3.5-turbo", messages=revision_messages)
+        response = rate_limit.call('openai', openai.ChatCompletion.create, model="gpt-3.5-turbo", messages=revision_messages)
         revised_content = response.choices[0].message["content"].strip()
         st.text(revised_content)
         st.download_button("Download Revised Content", revised_content, "revised_content_revision.txt")
@@ -1,12 +1,26 @@
 import streamlit as st
 import openai
-import requests
 from collections import Counter, defaultdict
-from bs4 import BeautifulSoup
 import pandas as pd
 import matplotlib.pyplot as plt
 import io
-import hashlib
+from lexicon import load_lexicon
+from scoring import WORD_RE, lexicon_automaton
+from fetching import fetch_all
+from canonical_urls import page_key, page_keys, parse_url_list, unique_pages
+import rate_limit
+from crawler import crawl
+from boilerplate import MainContentExtractor
+from page_cache import memoize
+from block_memo import analyze_blocks
+from near_duplicates import SharedAnalysis
+from audit_jobs import get_audit_jobs
+from llm_cache import get_llm_cache
+
+# Cached analyses are keyed by model, prompt version and lexicon version;
+# bump PROMPT_VERSION whenever the analysis prompt changes.
+ANALYSIS_MODEL = "gpt-4o-mini"
+PROMPT_VERSION = 1
 
 # Load your API key from Streamlit's secrets
 openai.api_key = st.secrets["OPENAI_API_KEY"]
@@ -14,45 +28,20 @@ openai.api_key = st.secrets["OPENAI_API_KEY"]
 client = openai
 
 # Define your color-based personas
-placeholders = {
-        "Purple - caring, encouraging": {"verbs": ["assist", "befriend", "care", "collaborate", "connect", "embrace", "empower", "encourage", "foster", "give", "help", "nourish", "nurture", "promote", "protect", "provide", "serve", "share", "shepherd", "steward", "tend", "uplift", "value", "welcome"], "adjectives": ["caring", "encouraging", "attentive", "compassionate", "empathetic", "generous", "hospitable", "nurturing", "protective", "selfless", "supportive", "welcoming"], 
-         "beliefs": ['Believe people should be cared for and encouraged', 'Desire to make others feel safe and supported', 'Have a strong desire to mend and heal', 'Become loyal teammates and trusted allies', 'Are put off by aggression and selfish motivations']},
-        "Green - adventurous, curious": {"verbs": ["analyze", "discover", "examine", "expand", "explore", "extend", "inquire", "journey", "launch", "move", "pioneer", "pursue", "question", "reach", "search", "uncover", "venture", "wonder"], "adjectives": ["adventurous", "curious", "discerning", "examining", "experiential", "exploratory", "inquisitive", "investigative", "intrepid", "philosophical"], 
-         "beliefs": ['The noblest pursuit is the quest for new knowledge', 'Continually inquiring and examining everything', 'Have an insatiable thirst for progress and discovery', 'Cannot sit still or accept present realities', 'Curiosity and possibility underpin their actions']},
-        "Maroon - gritty, determined": {"verbs": ["accomplish", "achieve", "build", "challenge", "commit", "compete", "contend", "dedicate", "defend", "devote", "drive", "endeavor", "entrust", "endure", "fight", "grapple", "grow", "improve", "increase", "overcome", "persevere", "persist", "press on", "pursue", "resolve"], "adjectives": ["competitive", "determined", "gritty", "industrious", "persevering", "relentless", "resilient", "tenacious", "tough", "unwavering"], 
-         "beliefs": ['Value extreme and hard work', 'Gritty and strong, they’re determined to overcome', 'Have no tolerance for laziness or inability', 'Highly competitive and intent on proving prowess', 'Will not be outpaced or outworked']},
-        "Orange - artistic, creative": {"verbs": ["compose", "conceptualize", "conceive", "craft", "create", "design", "dream", "envision", "express", "fashion", "form", "imagine", "interpret", "make", "originate", "paint", "perform", "portray", "realize", "shape"], "adjectives": ["artistic", "conceptual", "creative", "eclectic", "expressive", "imaginative", "interpretive", "novel", "original", "whimsical"], 
-         "beliefs": ['Intensely expressive', 'Communicate in diverse ways', 'A lack of imagination and rigidity may feel oppressive', 'Constructive, conceptual, and adept storytellers', 'Manifesting new and creative concepts is their end goal']},
-        "Yellow - innovative, intelligent": {"verbs": ["accelerate", "advance", "change", "conceive", "create", "engineer", "envision", "experiment", "dream", "ignite", "illuminate", "imagine", "innovate", "inspire", "invent", "pioneer", "progress", "shape", "spark", "solve", "transform", "unleash", "unlock"], "adjectives": ["advanced", "analytical", "brilliant", "experimental", "forward-thinking", "innovative", "intelligent", "inventive", "leading-edge", "visionary"], 
-         "beliefs": ['Thrive on new concepts and experimentation', 'Live to make things newer and better', 'Work well in ambiguity or unknowns', 'Feel stifled by established processes and the status quo', 'See endless possibilities and opportunities to invent']},
-        "Red - entertaining, humorous": {"verbs": ["animate", "amuse", "captivate", "cheer", "delight", "encourage", "energize", "engage", "enjoy", "enliven", "entertain", "excite", "express", "inspire", "joke", "motivate", "play", "stir", "uplift"], "adjectives": ["dynamic", "energetic", "engaging", "entertaining", "enthusiastic", "exciting", "fun", "lively", "magnetic", "playful", "humorous"], 
-         "beliefs": ['Energetic and uplifting', 'Motivated to entertain and create excitement', 'Magnetic and able to rally support for new concepts', 'Often naturally talented presenters and speakers', 'Sensitive to the mood and condition of others']},
-        "Blue - confident, influential": {"verbs": ["accomplish", "achieve", "affect", "assert", "cause", "command", "determine", "direct", "dominate", "drive", "empower", "establish", "guide", "impact", "impress", "influence", "inspire", "lead", "outpace", "outshine", "realize", "shape", "succeed", "transform", "win"], "adjectives": ["accomplished", "assertive", "confident", "decisive", "elite", "influential", "powerful", "prominent", "proven", "strong"], 
-         "beliefs": ['Achievement is paramount', 'Highly tolerant of risk and stress', 'Seeks influence and accomplishments', 'Comfortable making decisions with incomplete information', 'Set strategic visions and lead the way']},
-        "Pink - charming, elegant": {"verbs": ["arise", "aspire", "detail", "dream", "elevate", "enchant", "enrich", "envision", "exceed", "excel", "experience", "improve", "idealize", "imagine", "inspire", "perfect", "poise", "polish", "prepare", "refine", "uplift"], "adjectives": ["aesthetic", "charming", "classic", "dignified", "idealistic", "meticulous", "poised", "polished", "refined", "sophisticated", "elegant"], 
-         "beliefs": ['Hold high regard for tradition and excellence', 'Dream up and pursue refinement, beauty, and vitality', 'Typically highly detailed and very observant', 'Mess and disorder only deflates their enthusiasm']},
-        "Silver - rebellious, daring": {"verbs": ["activate", "campaign", "challenge", "commit", "confront", "dare", "defy", "disrupting", "drive", "excite", "face", "ignite", "incite", "influence", "inspire", "inspirit", "motivate", "move", "push", "rebel", "reimagine", "revolutionize", "rise", "spark", "stir", "fight", "free"], "adjectives": ["bold", "daring", "fearless", "independent", "non-conformist", "radical", "rebellious", "resolute", "unconventional", "valiant"], 
-         "beliefs": ['Rule breakers and establishment challengers', 'Have a low need to fit in with the pack', 'Value unconventional and independent thinking', 'Value freedom, boldness, and defiant ideas', 'Feel stifled by red tape and bureaucratic systems']},
-        "Beige - dedicated, humble": {"verbs": ["dedicate", "humble", "collaborate", "empower", "inspire", "empassion", "transform"], "adjectives": ["dedicated", "collaborative", "consistent", "empowering", "enterprising", "humble", "inspiring", "passionate", "proud", "traditional", "transformative"], 
-         "beliefs": ['There’s no need to differentiate from others', 'All perspectives are equally worth holding', 'Will not risk offending anyone', 'Light opinions are held quite loosely', 'Information tells enough of a story']},
-    }
-
-def get_content_hash(content):
-    return hashlib.md5(content.encode()).hexdigest()
-
-def extract_words(text, words_list):
-    words_counter = Counter()
-    for word in words_list:
-        words_counter[word] = text.lower().split().count(word.lower())
-    return words_counter
+placeholders = load_lexicon().placeholders
+
+def extract_words(word_counts, words_list):
+    return Counter({word: word_counts[word.lower()] for word in words_list})
 
 def analyze_url_content(content):
     color_scores = defaultdict(int)
     color_analysis = defaultdict(dict)
+    # Tokenize the page once; every color's breakdown is a lookup into these counts.
+    word_counts = lexicon_automaton('persona_index').term_counts(WORD_RE.findall(content.lower()))
 
     for color, traits in placeholders.items():
-        verbs_count = extract_words(content, traits['verbs'])
-        adjectives_count = extract_words(content, traits['adjectives'])
+        verbs_count = extract_words(word_counts, traits['verbs'])
+        adjectives_count = extract_words(word_counts, traits['adjectives'])
         total_count = sum(verbs_count.values()) + sum(adjectives_count.values())
         color_scores[color] = total_count
         color_analysis[color]['verbs'] = verbs_count
@@ -63,17 +52,17 @@ def analyze_url_content(content):
 def analyze_text_detailed(content, summarized_placeholders):
     prompt_base = f"Please analyze the following text and identify which verbs and adjectives from the following categories are present. Also, explain how these relate to the predefined beliefs of each category:\n\nCategories:\n" + "\n".join([f"{color}: Verbs({info['verbs']}), Adjectives({info['adjectives']})" for color, info in summarized_placeholders.items()]) + "\n\nText: "
 
-    text_chunks = [content[i:i+3000] for i in range(0, len(content), 3000)]
-    detailed_responses = []
-
-    for chunk in text_chunks:
-        prompt_text = prompt_base + chunk
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt_text}],
+    def analyze_chunk(chunk):
+        response = rate_limit.call('openai', openai.ChatCompletion.create, cache=True,
+            model=ANALYSIS_MODEL,
+            messages=[{"role": "user", "content": prompt_base + chunk}],
             max_tokens=500
         )
-        detailed_responses.append(response.choices[0].message['content'])
+        return response.choices[0].message['content']
+
+    # Paragraph chunks are analyzed once per distinct text, so re-auditing an
+    # edited page only sends the chunks that changed.
+    detailed_responses = analyze_blocks(f"chemassess-chunk-{ANALYSIS_MODEL}", prompt_base, content, analyze_chunk)
 
     return "\n".join(detailed_responses)
 
@@ -88,33 +77,77 @@ hide_toolbar_css = """
 st.markdown(hide_toolbar_css, unsafe_allow_html=True)
 
 url_input = st.text_area("Paste comma-separated URLs here:", height=100)
-urls = [url.strip() for url in url_input.split(',')]
+urls = parse_url_list(url_input)
+crawl_root = st.text_input("Or crawl a whole site from its root URL (reads robots.txt and sitemap.xml):")
+max_pages = st.number_input("Maximum pages to crawl", min_value=1, max_value=1000, value=100)
+
+restart = st.checkbox("Start over instead of resuming a previous run of this audit")
 
 results = st.session_state.get('results', [])
 aggregate_scores = st.session_state.get('aggregate_scores', defaultdict(int))
 
+def show_analysis(url, record):
+    st.write(f"Analysis for URL: {url}")
+    for color, score in record['top_colors']:
+        st.write(f"**{color}** - Score: {score}")
+        st.write("Reasons:")
+        for belief in placeholders[color]['beliefs']:
+            st.write(f"- {belief}")
+        st.write("Verbs found:")
+        for verb, count in record['found'][color]['verbs'].items():
+            st.write(f"  {verb}: {count}")
+        st.write("Adjectives found:")
+        for adjective, count in record['found'][color]['adjectives'].items():
+            st.write(f"  {adjective}: {count}")
+    st.write("Detailed Analysis:")
+    if record['duplicate_of']:
+        st.write(f"*Near-duplicate of {record['duplicate_of']}; analysis shared.*")
+    st.write(record['detailed'])
+    st.write("---")
+
+def add_result(record):
+    results.append(record['row'])
+    for color, score in record['top_colors']:
+        aggregate_scores[color] += score
+
 if st.button("Analyze URLs"):
     results = []
     aggregate_scores = defaultdict(int)
-
-    for url in urls:
+    extractor = MainContentExtractor()
+    shared = SharedAnalysis()
+
+    # Every finished page is checkpointed, so rerunning the same audit after a
+    # failure or a lost session picks up where it stopped.
+    if crawl_root.strip():
+        params = {'crawl_root': crawl_root.strip(), 'max_pages': max_pages}
+    else:
+        params = {'urls': urls}
+    params['lexicon'] = load_lexicon().version
+    job = get_audit_jobs().job('chemassess', params)
+    if restart:
+        job.reset()
+    completed = job.completed()
+    if completed:
+        st.write(f"Resuming: {len(completed)} URLs already analyzed in an earlier run.")
+    # Checkpointed pages seed the canonical-URL and near-duplicate state, so
+    # twins of pages finished earlier are skipped or share their analysis.
+    seen = set()
+    for url, record in completed.items():
+        seen.update(record.get('page_keys') or [page_key(url)])
+        if record.get('signature'):
+            shared.seed(url, record['signature'], record['detailed'])
+        add_result(record)
+        show_analysis(url, record)
+
+    if crawl_root.strip():
+        pages = unique_pages(crawl(crawl_root.strip(), max_pages=max_pages), seen)
+    else:
+        pages = unique_pages(fetch_all(job.pending(urls)), seen)
+    for result in pages:
+        url = result.url
         try:
             st.write(f"Analyzing URL: {url}")  # Debug statement
-            response = requests.get(url)
-            soup = BeautifulSoup(response.text, "html.parser")
-            content = soup.get_text()
-            content_hash = get_content_hash(content)
-
-            # Check if analysis for this content already exists
-            if 'analysis_cache' not in st.session_state:
-                st.session_state.analysis_cache = {}
-
-            if content_hash in st.session_state.analysis_cache:
-                color_scores, color_analysis = st.session_state.analysis_cache[content_hash]
-            else:
-                color_scores, color_analysis = analyze_url_content(content)
-                st.session_state.analysis_cache[content_hash] = (color_scores, color_analysis)
-
+            response = result.get()
             summarized_placeholders = {
                 color: {
                     'verbs': ', '.join(info['verbs']),
@@ -122,7 +155,15 @@ if st.button("Analyze URLs"):
                 } for color, info in placeholders.items()
             }
 
-            detailed_analysis = analyze_text_detailed(content, summarized_placeholders)
+            # Menus, banners and footers are dropped before scoring and the LLM call.
+            content = extractor.extract(url, response.text)
+
+            # Keyword scores are exact per page; the LLM analysis is shared by
+            # near-identical pages and reused for text seen in earlier audits.
+            color_scores, color_analysis = analyze_url_content(content)
+            detailed_analysis, duplicate_of = shared.run(url, content, lambda: memoize(
+                f"chemassess-detailed-{ANALYSIS_MODEL}-p{PROMPT_VERSION}-{load_lexicon().version}", content,
+                lambda: analyze_text_detailed(content, summarized_placeholders)))
 
             sorted_colors = sorted(color_scores.items(), key=lambda item: item[1], reverse=True)
             top_colors = sorted_colors[:3]
@@ -130,30 +171,33 @@ if st.button("Analyze URLs"):
             url_result = {"URL": url}
             for i, (color, score) in enumerate(top_colors):
                 url_result[f"Top Color {i + 1}"] = color
-                aggregate_scores[color] += score
-            results.append(url_result)
-
-            st.write(f"Analysis for URL: {url}")
-            for color, score in top_colors:
-                st.write(f"**{color}** - Score: {score}")
-                st.write("Reasons:")
-                for belief in placeholders[color]['beliefs']:
-                    st.write(f"- {belief}")
-                st.write("Verbs found:")
-                for verb, count in color_analysis[color]['verbs'].items():
-                    if count > 0:
-                        st.write(f"  {verb}: {count}")
-                st.write("Adjectives found:")
-                for adjective, count in color_analysis[color]['adjectives'].items():
-                    if count > 0:
-                        st.write(f"  {adjective}: {count}")
-            st.write("Detailed Analysis:")
-            st.write(detailed_analysis)
-            st.write("---")
+            url_result["Near-duplicate Of"] = duplicate_of or ""
+
+            record = {
+                'row': url_result,
+                'top_colors': top_colors,
+                'found': {
+                    color: {part: {word: count for word, count in color_analysis[color][part].items() if count > 0}
+                            for part in ('verbs', 'adjectives')}
+                    for color, _ in top_colors
+                },
+                'detailed': detailed_analysis,
+                'duplicate_of': duplicate_of,
+                'page_keys': sorted(page_keys(result)),
+                'signature': shared.signatures[url].tolist(),
+            }
+            job.record(url, record)
+            add_result(record)
+            show_analysis(url, record)
         except Exception as e:
+            job.fail(url, e)
             st.write(f"Error analyzing URL: {url}")
             st.write(f"Error message: {str(e)}")
 
+    job.finish()
+    cache_stats = get_llm_cache().stats()
+    st.caption(f"LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses this session; "
+               f"{cache_stats['entries']} responses stored.")
     st.session_state.results = results
     st.session_state.aggregate_scores = aggregate_scores
 
@@ -1,10 +1,11 @@
 import streamlit as st
 import openai
+import rate_limit
 import sys
 import logging
 import random
 from streamlit_oauth import OAuth2Component
-import requests
+import http_client
 
 # Load Google Auth credentials from Streamlit secrets
 google_auth = {
@@ -34,7 +35,7 @@ def fetch_user_info(token):
     headers = {
         "Authorization": f"Bearer {token['access_token']}"
     }
-    response = requests.get(user_info_endpoint, headers=headers)
+    response = http_client.get(user_info_endpoint, headers=headers)
     if response.status_code == 200:
         return response.json()
     else:
@@ -60,7 +61,7 @@ def generate_article(content, writing_styles, style_weights, user_prompt, keywor
         weight = style_weights[i]
         messages.append({"role": "assistant", "content": f"Modify {weight}% of the content in a {style.split(' - ')[1]} manner."})
 
-    response = openai.ChatCompletion.create(model="gpt-3.5-turbo", messages=messages)
+    response = rate_limit.call('openai', openai.ChatCompletion.create, model="gpt-3.5-turbo", messages=messages)
     generated_content = response.choices[0].message["content"].strip()
 
     # Ensure the content respects the min and max character limits
@@ -162,7 +163,7 @@ def main():
                 {"role": "user", "content": pasted_content},
                 {"role": "user", "content": revision_requests}
             ]
-            response = openai.ChatCompletion.create(model="gpt-3.5-turbo", messages=revision_messages)
+            response = rate_limit.call('openai', openai.ChatCompletion.create, model="gpt-3.5-turbo", messages=revision_messages)
             revised_content = response.choices[0].message["content"].strip()
             st.text(revised_content)
             st.download_button("Download Revised Content", revised_content, "revised_content_revision.txt")
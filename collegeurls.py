@@ -1,64 +1,71 @@
-from bs4 import BeautifulSoup
-import requests
-import time
 import pandas as pd
 import openai
 import streamlit as st
-import re
-from collections import Counter
 import base64
+from corpus_scoring import score_corpus, top_colors
+from fetching import fetch_all
+from canonical_urls import parse_url_list, unique_pages
+from crawler import crawl
+from boilerplate import EXTRACTION_VERSION, TemplateDetector, blocks_text
+from page_cache import memoize_all
+from parallel_scoring import extract_blocks_parallel
 
-def scrape_content_from_url(url):
-    response = requests.get(url)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.content, 'html.parser')
-    for tag in soup.find_all(['header', 'footer', 'nav']):
-        tag.decompose()
-    content = ' '.join([tag.get_text() for tag in soup.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])])
-    return content
+def process_urls(url_list, openai_api_key, stem=False):
+    return process_pages(unique_pages(fetch_all(url_list)), stem)
 
-def analyze_text(text, color_keywords):
-    text = text.lower()
-    words = re.findall(r'\b\w+\b', text)
-    color_counts = Counter()
-    for color, keywords in color_keywords.items():
-        color_counts[color] = sum(words.count(k.lower()) for k in keywords)
-    sorted_colors = sorted(color_counts.items(), key=lambda x: x[1], reverse=True)
-    return [color for color, _ in sorted_colors[:3]]
+def process_site(root_url, max_pages=100, stem=False):
+    return process_pages(crawl(root_url, max_pages=max_pages), stem)
 
-def process_urls(url_list, openai_api_key, rate_limit=60, delay_time=60):
-    results = []
-    for idx, url in enumerate(url_list):
+def process_pages(fetched_pages, stem=False):
+    # Request pacing is done per host by the HTTP client's rate limiter.
+    urls = {}
+    responses = {}
+    for result in fetched_pages:
+        urls[result.index] = result.url
         try:
-            content = scrape_content_from_url(url)
-            top_colors = analyze_text(content, color_keywords)
-            results.append((url, *top_colors))
-            if (idx + 1) % rate_limit == 0:
-                time.sleep(delay_time)
+            response = result.get()
+            response.raise_for_status()
+            responses[result.index] = response
         except:
+            pass
+    # Pages not seen in an earlier audit are parsed in the scoring process pool.
+    extracted = memoize_all(f"collegeurls-blocks-v{EXTRACTION_VERSION}", list(responses.values()),
+                            lambda missing: extract_blocks_parallel([response.content for response in missing], stem=stem))
+    page_blocks = {}
+    detector = TemplateDetector()
+    for idx, blocks in zip(responses, extracted):
+        if blocks is not None:
+            page_blocks[idx] = blocks
+            detector.add(urls[idx], blocks)
+    # With every page seen, blocks repeated across a site are dropped before scoring.
+    contents = {idx: blocks_text(detector.filter(urls[idx], blocks)) for idx, blocks in sorted(page_blocks.items())}
+    colors, scores = score_corpus(list(contents.values()), stem=stem, workers=None)
+    page_top_colors = dict(zip(contents, top_colors(scores, colors)))
+    results = []
+    for idx, url in sorted(urls.items()):
+        if idx in page_top_colors:
+            results.append((url, *page_top_colors[idx]))
+        else:
             results.append((url, "Error", "", ""))
-    return results
-
-color_keywords = {
-        'Red': ['Activate', 'Animate', 'Amuse', 'Captivate', 'Cheer', 'Delight', 'Encourage', 'Energize', 'Engage', 'Enjoy', 'Enliven', 'Entertain', 'Excite', 'Express', 'Inspire', 'Joke', 'Motivate', 'Play', 'Stir', 'Uplift', 'Amusing', 'Clever', 'Comedic', 'Dynamic', 'Energetic', 'Engaging', 'Enjoyable', 'Entertaining', 'Enthusiastic', 'Exciting', 'Expressive', 'Extroverted', 'Fun', 'Humorous', 'Interesting', 'Lively', 'Motivational', 'Passionate', 'Playful', 'Spirited'],
-        'Silver': ['Activate', 'Campaign', 'Challenge', 'Commit', 'Confront', 'Dare', 'Defy', 'Disrupting', 'Drive', 'Excite', 'Face', 'Ignite', 'Incite', 'Influence', 'Inspire', 'Inspirit', 'Motivate', 'Move', 'Push', 'Rebel', 'Reimagine', 'Revolutionize', 'Rise', 'Spark', 'Stir', 'Fight', 'Free', 'Aggressive', 'Bold', 'Brazen', 'Committed', 'Courageous', 'Daring', 'Disruptive', 'Driven', 'Fearless', 'Free', 'Gutsy', 'Independent', 'Inspired', 'Motivated', 'Rebellious', 'Revolutionary', 'Unafraid', 'Unconventional'],
-        'Blue': ['Accomplish', 'Achieve', 'Affect', 'Assert', 'Cause', 'Command', 'Determine', 'Direct', 'Dominate', 'Drive', 'Empower', 'Establish', 'Guide', 'Impact', 'Impress', 'Influence', 'Inspire', 'Lead', 'Outpace', 'Outshine', 'Realize', 'Shape', 'Succeed', 'Transform', 'Win', 'Accomplished', 'Assertive', 'Authoritative', 'Commanding', 'Confident', 'Decisive', 'Distinguished', 'Dominant', 'Elite', 'Eminent', 'Established', 'Exceptional', 'Expert', 'First-class', 'First-rate', 'Impressive', 'Influential', 'Leading', 'Magnetic', 'Managerial', 'Masterful', 'Noble', 'Premier', 'Prestigious', 'Prominent', 'Proud', 'Strong'],
-        'Yellow': ['Accelerate', 'Advance', 'Change', 'Conceive', 'Create', 'Engineer', 'Envision', 'Experiment', 'Dream', 'Ignite', 'Illuminate', 'Imagine', 'Innovate', 'Inspire', 'Invent', 'Pioneer', 'Progress', 'Shape', 'Spark', 'Solve', 'Transform', 'Unleash', 'Unlock', 'Advanced', 'Brilliant', 'Conceptual', 'Enterprising', 'Expert', 'Extraordinary', 'Forward-looking', 'Forward-thinking', 'Fresh', 'Future-minded', 'Future-thinking', 'Ingenious', 'Intelligent', 'Inventive', 'Leading-edge', 'Luminous', 'New', 'Pioneering', 'Reforming', 'Rising', 'Transformative', 'Visionary', 'World-changing', 'World-class'],
-        'Green': ['Analyze', 'Discover', 'Examine', 'Expand', 'Explore', 'Extend', 'Inquire', 'Journey', 'Launch', 'Move', 'Pioneer', 'Pursue', 'Question', 'Reach', 'Search', 'Uncover', 'Venture', 'Wonder', 'Adventurous', 'Analytical', 'Curious', 'Discerning', 'Experiential', 'Exploratory', 'Fearless', 'Inquisitive', 'Intriguing', 'Investigative', 'Journeying', 'Mysterious', 'Philosophical', 'Pioneering', 'Questioning', 'Unbound', 'Unexpected'],
-        'Purple': ['Accommodate', 'Assist', 'Befriend', 'Care', 'Collaborate', 'Connect', 'Embrace', 'Empower', 'Encourage', 'Foster', 'Give', 'Help', 'Nourish', 'Nurture', 'Promote', 'Protect', 'Provide', 'Serve', 'Share', 'Shepherd', 'Steward', 'Tend', 'Uplift', 'Value', 'Welcome', 'Affectionate', 'Attentive', 'Beneficial', 'Benevolent', 'Big-hearted', 'Caring', 'Charitable', 'Compassionate', 'Considerate', 'Encouraging', 'Friendly', 'Generous', 'Gentle', 'Helpful', 'Hospitable', 'Inclusive', 'Kind-hearted', 'Merciful', 'Missional', 'Neighborly', 'Nurturing', 'Protective', 'Responsible', 'Selfless', 'Supportive', 'Sympathetic', 'Thoughtful', 'Uplifting', 'Vocational', 'Warm'],
-        'Maroon': ['Accomplish', 'Achieve', 'Build', 'Challenge', 'Commit', 'Compete', 'Contend', 'Dedicate', 'Defend', 'Devote', 'Drive', 'Endeavor', 'Entrust', 'Endure', 'Fight', 'Grapple', 'Grow', 'Improve', 'Increase', 'Overcome', 'Persevere', 'Persist', 'Press on', 'Pursue', 'Resolve', 'Tackle', 'Ambitious', 'Brave', 'Committed', 'Competitive', 'Consistent', 'Constant', 'Continuous', 'Courageous', 'Dedicated', 'Determined', 'Earnest', 'Industrious', 'Loyal', 'Persevering', 'Persistent', 'Proud', 'Purposeful', 'Relentless', 'Reliable', 'Resilient', 'Resolute', 'Steadfast', 'Strong', 'Tenacious', 'Tireless', 'Tough'],
-        'Orange': ['Compose', 'Conceptualize', 'Conceive', 'Craft', 'Create', 'Design', 'Dream', 'Envision', 'Express', 'Fashion', 'Form', 'Imagine', 'Interpret', 'Make', 'Originate', 'Paint', 'Perform', 'Portray', 'Realize', 'Shape', 'Abstract', 'Artistic', 'Avant-garde', 'Colorful', 'Conceptual', 'Contemporary', 'Creative', 'Decorative', 'Eccentric', 'Eclectic', 'Evocative', 'Expressive', 'Imaginative', 'Interpretive', 'Offbeat', 'One-of-a-kind', 'Original', 'Uncommon', 'Unconventional', 'Unexpected', 'Unique', 'Vibrant', 'Whimsical'],
-        'Pink': ['Arise', 'Aspire', 'Detail', 'Dream', 'Elevate', 'Enchant', 'Enrich', 'Envision', 'Exceed', 'Excel', 'Experience', 'Improve', 'Idealize', 'Imagine', 'Inspire', 'Perfect', 'Poise', 'Polish', 'Prepare', 'Refine', 'Uplift', 'Affectionate', 'Admirable', 'Age-less', 'Beautiful', 'Classic', 'Desirable', 'Detailed', 'Dreamy', 'Elegant', 'Enchanting', 'Enriching', 'Ethereal', 'Excellent', 'Exceptional', 'Experiential', 'Exquisite', 'Glamorous', 'Graceful', 'Idealistic', 'Inspiring', 'Lofty', 'Mysterious', 'Ordered', 'Perfect', 'Poised', 'Polished', 'Pristine', 'Pure', 'Refined', 'Romantic', 'Sophisticated', 'Spiritual', 'Timeless', 'Traditional', 'Virtuous', 'Visionary']
-  }
+    aggregate_scores = dict(zip(colors, scores.sum(axis=0).tolist()))
+    return results, aggregate_scores
 
 def main():
-    url_list = st.text_area("Paste your comma-separated URLs here:").split(',')
+    url_list = parse_url_list(st.text_area("Paste your comma-separated URLs here:"))
     openai_api_key = st.secrets["OPENAI_API_KEY"]
+    crawl_root = st.text_input("Or crawl a whole site from its root URL (reads robots.txt and sitemap.xml):")
+    max_pages = st.number_input("Maximum pages to crawl", min_value=1, max_value=1000, value=100)
+    match_word_forms = st.checkbox("Match word forms (e.g. 'empowering' counts as 'empower')")
 
     if st.button('Analyze'):
-        results = process_urls(url_list, openai_api_key)
+        if crawl_root.strip():
+            results, aggregate_scores = process_site(crawl_root.strip(), max_pages=max_pages, stem=match_word_forms)
+        else:
+            results, aggregate_scores = process_urls(url_list, openai_api_key, stem=match_word_forms)
         df = pd.DataFrame(results, columns=["URL", "Top Color", "Top Supporting Color", "Additional Supporting Color"])
         st.write(df)
+        st.subheader("Aggregate Color Scores")
+        st.bar_chart(pd.Series(aggregate_scores, name="Score"))
         csv = df.to_csv(index=False)
         b64 = base64.b64encode(csv.encode()).decode()
         href = f'<a href="data:file/csv;base64,{b64}" download="color_analysis.csv">Download CSV File</a>'
@@ -0,0 +1,75 @@
+from functools import lru_cache
+
+import numpy as np
+from scipy import sparse
+
+from lexicon import load_lexicon
+from parallel_scoring import term_counts_parallel
+from scoring import WORD_RE, KeywordAutomaton
+
+
+class CorpusScorer:
+    # Scores many documents at once as (document x term) @ (term x color).
+    def __init__(self, index, stem=False):
+        self.colors = list(index.colors)
+        self.automaton = KeywordAutomaton.from_index(index, stem=stem)
+        term_colors = self.automaton.term_colors
+        self.vocabulary = {term: i for i, term in enumerate(term_colors)}
+        color_ids = {color: i for i, color in enumerate(self.colors)}
+        rows, cols = [], []
+        for term, colors in term_colors.items():
+            for color in colors:
+                rows.append(self.vocabulary[term])
+                cols.append(color_ids[color])
+        self.incidence = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int64), (rows, cols)),
+            shape=(len(self.vocabulary), len(self.colors))
+        )
+
+    def document_term_matrix(self, documents):
+        term_counts = self.automaton.term_counts
+        return self.matrix_from_term_counts(term_counts(WORD_RE.findall(document.lower())) for document in documents)
+
+    def matrix_from_term_counts(self, document_term_counts):
+        vocabulary = self.vocabulary
+        indptr, indices, data = [0], [], []
+        for term_counts in document_term_counts:
+            for term, count in term_counts.items():
+                indices.append(vocabulary[term])
+                data.append(count)
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.array(data, dtype=np.int64), np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, len(vocabulary))
+        )
+
+    def score(self, documents):
+        return self.score_matrix(self.document_term_matrix(documents))
+
+    def score_matrix(self, document_term_matrix):
+        return (document_term_matrix @ self.incidence).toarray()
+
+
+@lru_cache(maxsize=8)
+def _corpus_scorer(version, index_name, stem):
+    return CorpusScorer(getattr(load_lexicon(), index_name), stem=stem)
+
+
+def get_corpus_scorer(index_name='keyword_index', stem=False):
+    return _corpus_scorer(load_lexicon().version, index_name, stem)
+
+
+def score_corpus(documents, index_name='keyword_index', stem=False, workers=1):
+    # workers=None uses every core; tokenizing and matching then run in a process
+    # pool and only the sparse matrix is assembled here.
+    scorer = get_corpus_scorer(index_name, stem)
+    if workers == 1:
+        return scorer.colors, scorer.score(documents)
+    term_counts = term_counts_parallel(documents, index_name, stem, workers)
+    return scorer.colors, scorer.score_matrix(scorer.matrix_from_term_counts(term_counts))
+
+
+def top_colors(scores, colors, n=3):
+    # Stable sort keeps lexicon order between tied colors, like sorted() did per page.
+    order = np.argsort(-scores, axis=1, kind='stable')[:, :n]
+    return [[colors[i] for i in row] for row in order]
@@ -0,0 +1,169 @@
+import posixpath
+import xml.etree.ElementTree as ElementTree
+from collections import deque
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+
+import http_client
+from fetching import fetch_all
+from html_text import decode_html
+from canonical_urls import canonical_url, normalize_url, page_key, unique_pages
+from page_cache import cached_get
+from rate_limit import host_limiter
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+MAX_PAGES = 100
+MAX_DEPTH = 3
+MAX_FRONTIER = 1000
+MAX_SITEMAPS = 20
+SKIP_EXTENSIONS = frozenset((
+    '.pdf', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.ico', '.css', '.js', '.json', '.xml', '.zip',
+    '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.mp3', '.mp4', '.mov', '.avi', '.ics', '.rss',
+))
+
+
+def site_of(url):
+    host = (urlsplit(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def is_crawlable(url, site):
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or site_of(url) != site:
+        return False
+    return posixpath.splitext(parts.path)[1].lower() not in SKIP_EXTENSIONS
+
+
+def extract_links(html, base_url):
+    if lxml is not None:
+        text = decode_html(html)
+        if not text.strip():
+            return []
+        root = lxml.html.document_fromstring(text)
+        hrefs = root.xpath('//a/@href')
+        base = root.xpath('//base/@href')
+    else:
+        from bs4 import BeautifulSoup, SoupStrainer
+        soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer(['a', 'base']))
+        hrefs = [a['href'] for a in soup.find_all('a', href=True)]
+        base = [b['href'] for b in soup.find_all('base', href=True)]
+    base_url = urljoin(base_url, base[0]) if base else base_url
+    return [urljoin(base_url, href.strip()) for href in hrefs]
+
+
+def parse_sitemap(content):
+    # Returns (page URLs, nested sitemap URLs) from a urlset or sitemapindex.
+    try:
+        root = ElementTree.fromstring(content)
+    except ElementTree.ParseError:
+        return [], []
+    locs = [loc.text.strip() for loc in root.findall('.//{*}loc') if loc.text]
+    if root.tag.endswith('sitemapindex'):
+        return [], locs
+    return locs, []
+
+
+class SiteCrawler:
+    # Breadth-first crawl of one site. The seeds are the root URL and the
+    # sitemap entries; each depth level is fetched concurrently through
+    # fetch_all and its pages are yielded as they arrive, while their same-site
+    # links form the next level. robots.txt is honoured for every URL.
+    def __init__(self, root_url, max_pages=MAX_PAGES, max_depth=MAX_DEPTH, max_frontier=MAX_FRONTIER,
+                 use_sitemaps=True, fetch=cached_get, robots_fetch=http_client.get):
+        if '://' not in root_url:
+            root_url = f"https://{root_url}"
+        self.root_url = root_url
+        self.site = site_of(root_url)
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.max_frontier = max_frontier
+        self.use_sitemaps = use_sitemaps
+        self.fetch = fetch
+        self.robots_fetch = robots_fetch
+        self.robots = RobotFileParser()
+        self.seen = set()
+        self.yielded = set()
+        self.frontier = deque()
+        self.pages = 0
+
+    def _get_text(self, url):
+        try:
+            response = self.robots_fetch(url)
+        except Exception:
+            return None
+        return response.text if response.status_code == 200 else None
+
+    def load_robots(self):
+        robots_url = urljoin(self.root_url, '/robots.txt')
+        self.robots.set_url(robots_url)
+        text = self._get_text(robots_url)
+        # A missing robots.txt allows everything, as RobotFileParser.read() does.
+        self.robots.parse(text.splitlines() if text else [])
+        delay = self.robots.crawl_delay(http_client.USER_AGENT)
+        if delay:
+            host_limiter.configure((urlsplit(self.root_url).hostname or '').lower(), 1 / float(delay), 1)
+
+    def allowed(self, url):
+        return self.robots.can_fetch(http_client.USER_AGENT, url)
+
+    def sitemap_urls(self):
+        pending = deque(self.robots.site_maps() or [urljoin(self.root_url, '/sitemap.xml')])
+        visited = set()
+        while pending and len(visited) < MAX_SITEMAPS:
+            sitemap_url = pending.popleft()
+            if sitemap_url in visited:
+                continue
+            visited.add(sitemap_url)
+            try:
+                response = self.robots_fetch(sitemap_url)
+            except Exception:
+                continue
+            if response.status_code != 200:
+                continue
+            pages, nested = parse_sitemap(response.content)
+            pending.extend(nested)
+            for page in pages:
+                yield page
+
+    def enqueue(self, url, depth):
+        url = normalize_url(url)
+        key = page_key(url)
+        if key in self.seen or depth > self.max_depth or len(self.frontier) >= self.max_frontier:
+            return
+        if not is_crawlable(url, self.site) or not self.allowed(url):
+            return
+        self.seen.add(key)
+        self.frontier.append((url, depth))
+
+    def crawl(self):
+        self.load_robots()
+        self.enqueue(self.root_url, 0)
+        if self.use_sitemaps:
+            for url in self.sitemap_urls():
+                self.enqueue(url, 0)
+        while self.frontier and self.pages < self.max_pages:
+            depth = self.frontier[0][1]
+            level = []
+            while self.frontier and self.frontier[0][1] == depth and len(level) < self.max_pages - self.pages:
+                level.append(self.frontier.popleft()[0])
+            # Pages that turn out to be a redirect or canonical duplicate of one
+            # already yielded are dropped, and their canonical is not queued again.
+            for result in unique_pages(fetch_all(level, fetch=self.fetch), self.yielded):
+                result.index = self.pages
+                result.depth = depth
+                self.pages += 1
+                if result.error is None and result.response.status_code == 200:
+                    response = result.response
+                    self.seen.add(page_key(canonical_url(response, result.url)))
+                    if depth < self.max_depth and 'html' in response.headers.get('Content-Type', 'text/html'):
+                        for link in extract_links(response.content, response.url or result.url):
+                            self.enqueue(link, depth + 1)
+                yield result
+
+
+def crawl(root_url, **kwargs):
+    return SiteCrawler(root_url, **kwargs).crawl()
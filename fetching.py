@@ -0,0 +1,79 @@
+import asyncio
+import queue
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import page_cache
+
+GLOBAL_LIMIT = 16
+PER_HOST_LIMIT = 4
+
+
+class FetchResult:
+    def __init__(self, index, url, response=None, error=None):
+        self.index = index
+        self.url = url
+        self.response = response
+        self.error = error
+
+    def get(self):
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+def host_of(url):
+    return urlsplit(url).netloc.lower()
+
+
+async def _fetch_one(index, url, fetch, executor, global_limit, host_limits, results):
+    loop = asyncio.get_running_loop()
+    async with global_limit, host_limits[host_of(url)]:
+        try:
+            result = FetchResult(index, url, response=await loop.run_in_executor(executor, fetch, url))
+        except Exception as e:
+            result = FetchResult(index, url, error=e)
+    results.put(result)
+
+
+async def _fetch_urls(urls, fetch, executor, global_limit, per_host_limit, results):
+    global_semaphore = asyncio.Semaphore(global_limit)
+    host_limits = defaultdict(lambda: asyncio.Semaphore(per_host_limit))
+    await asyncio.gather(*(
+        _fetch_one(index, url, fetch, executor, global_semaphore, host_limits, results)
+        for index, url in enumerate(urls)
+    ), return_exceptions=True)
+
+
+def _run(loop, main):
+    try:
+        loop.run_until_complete(main)
+    except asyncio.CancelledError:
+        pass
+
+
+def fetch_all(urls, fetch=page_cache.cached_get, global_limit=GLOBAL_LIMIT, per_host_limit=PER_HOST_LIMIT):
+    # Fetches every URL concurrently, at most global_limit at once and at most
+    # per_host_limit against any one host, and yields each FetchResult as soon as
+    # it completes. The event loop runs on its own thread, so pages keep
+    # downloading while the caller analyzes the ones already yielded.
+    urls = list(urls)
+    if not urls:
+        return
+    loop = asyncio.new_event_loop()
+    executor = ThreadPoolExecutor(max_workers=global_limit)
+    results = queue.Queue()
+    main = loop.create_task(_fetch_urls(urls, fetch, executor, global_limit, per_host_limit, results))
+    thread = threading.Thread(target=_run, args=(loop, main), daemon=True)
+    thread.start()
+    try:
+        for _ in urls:
+            yield results.get()
+    finally:
+        # Stopping early cancels the fetches not yet started.
+        loop.call_soon_threadsafe(main.cancel)
+        thread.join()
+        executor.shutdown(wait=False, cancel_futures=True)
+        loop.close()
@@ -0,0 +1,164 @@
+import bisect
+import re
+from html.parser import HTMLParser
+
+from html_text import CONTENT_TAGS, NON_TEXT_TAGS, TEMPLATE_TAGS, decode_html
+from token_count import count_tokens
+
+BLOCK_TAGS = frozenset(CONTENT_TAGS)
+SKIP_TAGS = frozenset(NON_TEXT_TAGS + TEMPLATE_TAGS + ('head', 'noscript'))
+# Block-level tags whose start or end closes an unclosed <p>, as browsers do.
+CLOSES_P = frozenset((
+    'address', 'article', 'aside', 'blockquote', 'body', 'dd', 'details', 'div', 'dl', 'dt', 'fieldset',
+    'figcaption', 'figure', 'footer', 'form', 'header', 'hr', 'html', 'li', 'main', 'nav', 'ol', 'pre',
+    'section', 'table', 'td', 'th', 'tr', 'ul',
+)) | BLOCK_TAGS
+# Tags that end a run of loose text; inline tags (a, b, span, ...) stay inside it.
+BREAK_TAGS = CLOSES_P | frozenset(('br', 'caption', 'tbody', 'thead', 'tfoot', 'summary', 'dialog', 'menu')) | SKIP_TAGS
+NEWLINE_RE = re.compile(r'\n')
+BLOCK_SEPARATOR = '\n'
+
+
+class HtmlChunk:
+    # A run of whole blocks. spans are the (start, end) offsets of each block
+    # in the source HTML, so results for the chunk can be mapped back to it.
+    def __init__(self, html, spans, tokens):
+        self.spans = spans
+        self.tokens = tokens
+        self.text = BLOCK_SEPARATOR.join(html[start:end] for start, end in spans)
+
+    @property
+    def start(self):
+        return self.spans[0][0]
+
+    @property
+    def end(self):
+        return self.spans[-1][1]
+
+    def __str__(self):
+        return self.text
+
+
+class _BlockScanner(HTMLParser):
+    # One pass over the markup, yielding the source span of every heading or
+    # paragraph and of every visible text run outside them. A text run keeps
+    # its inline markup and ends only at a block-level tag.
+    def __init__(self, html):
+        super().__init__(convert_charrefs=True)
+        self.html = html
+        self.line_starts = [0] + [m.end() for m in NEWLINE_RE.finditer(html)]
+        self.spans = []
+        self.block = None
+        self.block_start = None
+        self.block_depth = 0
+        self.skip_depth = 0
+        self.text_start = None
+        self.text_seen = False
+
+    def _offset(self):
+        line, column = self.getpos()
+        return self.line_starts[line - 1] + column
+
+    def _in_text(self):
+        return self.block is None and not self.skip_depth
+
+    def _start_text(self, offset):
+        if self.text_start is None and self._in_text():
+            self.text_start = offset
+
+    def _end_text(self, offset):
+        if self.text_start is not None and self.text_seen:
+            text = self.html[self.text_start:offset]
+            start = self.text_start + len(text) - len(text.lstrip())
+            self.spans.append((start, start + len(text.strip())))
+        self.text_start = None
+        self.text_seen = False
+
+    def _end_block(self, offset):
+        self.spans.append((self.block_start, offset))
+        self.block = None
+
+    def handle_starttag(self, tag, attrs):
+        offset = self._offset()
+        if self.block is not None and tag in CLOSES_P and self.block == 'p':
+            self._end_block(offset)
+        if tag in BREAK_TAGS:
+            self._end_text(offset)
+        else:
+            self._start_text(offset)
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+        elif self.block is None and not self.skip_depth and tag in BLOCK_TAGS:
+            self.block, self.block_start, self.block_depth = tag, offset, 0
+        elif self.block == tag:
+            self.block_depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        offset = self._offset()
+        if self.block == 'p' and tag == 'hr':
+            self._end_block(offset)
+        if tag in BREAK_TAGS:
+            self._end_text(offset)
+        else:
+            self._start_text(offset)
+
+    def handle_endtag(self, tag):
+        offset = self._offset()
+        end = self.html.find('>', offset) + 1 or len(self.html)
+        if tag in SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif self.block == tag:
+            if self.block_depth:
+                self.block_depth -= 1
+            else:
+                self._end_block(end)
+            return
+        elif self.block == 'p' and tag in CLOSES_P:
+            self._end_block(offset)
+        if tag in BREAK_TAGS:
+            self._end_text(offset)
+
+    def handle_data(self, data):
+        if self._in_text():
+            self._start_text(self._offset())
+            self.text_seen = self.text_seen or bool(data.strip())
+
+    def scan(self):
+        self.feed(self.html)
+        self.close()
+        end = len(self.html)
+        if self.block is not None:
+            self._end_block(end)
+        self._end_text(end)
+        return self.spans
+
+
+def html_blocks(html):
+    return _BlockScanner(decode_html(html)).scan()
+
+
+def chunk_html(html, max_tokens=25000, model=None):
+    # Packs whole blocks greedily into chunks of at most max_tokens. Each
+    # block is tokenized once and never split, so a block larger than the
+    # budget becomes a chunk of its own. Offsets refer to the decoded html.
+    html = decode_html(html)
+    separator = count_tokens(BLOCK_SEPARATOR, model)
+    chunks, spans, tokens = [], [], 0
+    for span in html_blocks(html):
+        cost = count_tokens(html[span[0]:span[1]], model)
+        if spans and tokens + separator + cost > max_tokens:
+            chunks.append(HtmlChunk(html, spans, tokens))
+            spans, tokens = [], 0
+        tokens += cost + (separator if spans else 0)
+        spans.append(span)
+    if spans:
+        chunks.append(HtmlChunk(html, spans, tokens))
+    return chunks
+
+
+def chunk_at(chunks, offset):
+    # The chunk containing a source offset, for mapping results back to the page.
+    index = bisect.bisect_right([chunk.start for chunk in chunks], offset) - 1
+    if index >= 0 and offset < chunks[index].end:
+        return chunks[index]
+    return None
@@ -0,0 +1,123 @@
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.dammit import UnicodeDammit
+
+try:
+    import lxml.html
+    import lxml.etree
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+PARAGRAPH_TAGS = ('p',)
+CONTENT_TAGS = ('p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+CHROME_TAGS = ('header', 'footer', 'nav')
+# BeautifulSoup's get_text() leaves out script, style and template contents;
+# the other backends blank them before reading text so the output matches.
+NON_TEXT_TAGS = ('script', 'style')
+TEMPLATE_TAGS = ('template',)
+
+XML_DECLARATION_RE = re.compile(r'^\s*<\?xml[^>]*\?>', re.IGNORECASE)
+
+
+def decode_html(html):
+    # Bytes are decoded the way BeautifulSoup decodes them (declared encoding
+    # first, then detection) so every backend sees the same characters.
+    if isinstance(html, bytes):
+        return UnicodeDammit(html, is_html=True).unicode_markup or ''
+    return html
+
+
+def _soup_tag_text(html, tags, exclude):
+    soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer(list(tags + exclude + TEMPLATE_TAGS)))
+    for tag in soup.find_all(list(exclude)):
+        tag.decompose()
+    return [tag.get_text() for tag in soup.find_all(list(tags))]
+
+
+def _soup_page_text(html):
+    return BeautifulSoup(html, 'html.parser').get_text()
+
+
+def _lxml_root(html):
+    html = XML_DECLARATION_RE.sub('', decode_html(html))
+    if not html.strip():
+        return None
+    root = lxml.html.document_fromstring(html)
+    lxml.etree.strip_elements(root, *NON_TEXT_TAGS, with_tail=False)
+    for template in root.iter(*TEMPLATE_TAGS):
+        template.text = None
+        for element in template.iterdescendants():
+            element.text = element.tail = None
+    return root
+
+
+def _lxml_tag_text(html, tags, exclude):
+    root = _lxml_root(html)
+    if root is None:
+        return []
+    for element in list(root.iter(*exclude)) if exclude else ():
+        if element.getparent() is not None:
+            element.drop_tree()
+    return [element.text_content() for element in root.iter(*tags)]
+
+
+def _lxml_page_text(html):
+    root = _lxml_root(html)
+    return '' if root is None else root.text_content()
+
+
+def _lexbor_tree(html):
+    tree = LexborHTMLParser(decode_html(html))
+    tree.strip_tags(list(NON_TEXT_TAGS))
+    return tree
+
+
+def _selectolax_tag_text(html, tags, exclude):
+    tree = _lexbor_tree(html)
+    if exclude:
+        for node in tree.css(', '.join(exclude)):
+            node.decompose()
+    return [node.text(deep=True) for node in tree.css(', '.join(tags))]
+
+
+def _selectolax_page_text(html):
+    tree = _lexbor_tree(html)
+    return tree.root.text(deep=True) if tree.root is not None else ''
+
+
+BACKENDS = {'html.parser': (_soup_tag_text, _soup_page_text)}
+if lxml is not None:
+    BACKENDS['lxml'] = (_lxml_tag_text, _lxml_page_text)
+if LexborHTMLParser is not None:
+    BACKENDS['selectolax'] = (_selectolax_tag_text, _selectolax_page_text)
+
+# lxml and selectolax build their trees in C and close an open <p> at the next
+# block element as browsers do; html.parser nests it instead, so the text can
+# differ on such malformed markup. Pick 'html.parser' for exact legacy output.
+DEFAULT_BACKEND = next(name for name in ('selectolax', 'lxml', 'html.parser') if name in BACKENDS)
+
+
+def tag_text(html, tags=CONTENT_TAGS, exclude=(), backend=None):
+    # Text of every element named in tags, in document order, skipping anything
+    # inside an exclude element. Only the needed elements are materialized.
+    tag_text, _ = BACKENDS[backend or DEFAULT_BACKEND]
+    return tag_text(html, tuple(tags), tuple(exclude))
+
+
+def paragraph_text(html, backend=None):
+    return " ".join(tag_text(html, PARAGRAPH_TAGS, backend=backend))
+
+
+def content_text(html, backend=None):
+    return ' '.join(tag_text(html, CONTENT_TAGS, CHROME_TAGS, backend=backend))
+
+
+def page_text(html, backend=None):
+    _, page_text = BACKENDS[backend or DEFAULT_BACKEND]
+    return page_text(html)
@@ -1,15 +1,25 @@
 import streamlit as st
-import requests
 from bs4 import BeautifulSoup
-from transformers import GPT2Tokenizer
 from collections import Counter, defaultdict
 from typing import Generator
 from groq import Groq
+from lexicon import load_lexicon
+from fetching import fetch_all
+from canonical_urls import parse_url_list, unique_pages
+import rate_limit
+from page_cache import memoize
+from token_count import content_budget, count_tokens
+from html_chunks import chunk_html
 
 st.set_page_config(page_icon="💬", layout="wide", page_title="Streamlit-Groq HTML Analyzer and Reviser")
 
-# Initialize tokenizer
-tokenizer = GPT2Tokenizer.from_pretrained("gpt2")
+# Chunk budgets are counted with the encoding of the model the chunks go to
+# and fit its context window with MAX_OUTPUT_TOKENS left for the reply.
+# Cached analyses are keyed by model, prompt version and lexicon version; bump
+# PROMPT_VERSION whenever the analysis prompt changes.
+ANALYSIS_MODEL = "llama3-70b-8192"
+PROMPT_VERSION = 1
+MAX_OUTPUT_TOKENS = 2048
 
 # Load your API key from Streamlit's secrets
 groq_api_key = st.secrets["GROQ_API_KEY"]
@@ -18,65 +28,10 @@ groq_api_key = st.secrets["GROQ_API_KEY"]
 client = Groq(api_key=groq_api_key)
 
 # Define your color-based personas
-placeholders = {
-    "Purple - caring, encouraging": {"verbs": ["assist", "befriend", "care", "collaborate", "connect", "embrace", "empower", "encourage", "foster", "give", "help", "nourish", "nurture", "promote", "protect", "provide", "serve", "share", "shepherd", "steward", "tend", "uplift", "value", "welcome"], "adjectives": ["caring", "encouraging", "attentive", "compassionate", "empathetic", "generous", "hospitable", "nurturing", "protective", "selfless", "supportive", "welcoming"], 
-     "beliefs": ['Believe people should be cared for and encouraged', 'Desire to make others feel safe and supported', 'Have a strong desire to mend and heal', 'Become loyal teammates and trusted allies', 'Are put off by aggression and selfish motivations']},
-    "Green - adventurous, curious": {"verbs": ["analyze", "discover", "examine", "expand", "explore", "extend", "inquire", "journey", "launch", "move", "pioneer", "pursue", "question", "reach", "search", "uncover", "venture", "wonder"], "adjectives": ["adventurous", "curious", "discerning", "examining", "experiential", "exploratory", "inquisitive", "investigative", "intrepid", "philosophical"], 
-     "beliefs": ['The noblest pursuit is the quest for new knowledge', 'Continually inquiring and examining everything', 'Have an insatiable thirst for progress and discovery', 'Cannot sit still or accept present realities', 'Curiosity and possibility underpin their actions']},
-    "Maroon - gritty, determined": {"verbs": ["accomplish", "achieve", "build", "challenge", "commit", "compete", "contend", "dedicate", "defend", "devote", "drive", "endeavor", "entrust", "endure", "fight", "grapple", "grow", "improve", "increase", "overcome", "persevere", "persist", "press on", "pursue", "resolve"], "adjectives": ["competitive", "determined", "gritty", "industrious", "persevering", "relentless", "resilient", "tenacious", "tough", "unwavering"], 
-     "beliefs": ['Value extreme and hard work', 'Gritty and strong, they’re determined to overcome', 'Have no tolerance for laziness or inability', 'Highly competitive and intent on proving prowess', 'Will not be outpaced or outworked']},
-    "Orange - artistic, creative": {"verbs": ["compose", "conceptualize", "conceive", "craft", "create", "design", "dream", "envision", "express", "fashion", "form", "imagine", "interpret", "make", "originate", "paint", "perform", "portray", "realize", "shape"], "adjectives": ["artistic", "conceptual", "creative", "eclectic", "expressive", "imaginative", "interpretive", "novel", "original", "whimsical"], 
-     "beliefs": ['Intensely expressive', 'Communicate in diverse ways', 'A lack of imagination and rigidity may feel oppressive', 'Constructive, conceptual, and adept storytellers', 'Manifesting new and creative concepts is their end goal']},
-    "Yellow - innovative, intelligent": {"verbs": ["accelerate", "advance", "change", "conceive", "create", "engineer", "envision", "experiment", "dream", "ignite", "illuminate", "imagine", "innovate", "inspire", "invent", "pioneer", "progress", "shape", "spark", "solve", "transform", "unleash", "unlock"], "adjectives": ["advanced", "analytical", "brilliant", "experimental", "forward-thinking", "innovative", "intelligent", "inventive", "leading-edge", "visionary"], 
-     "beliefs": ['Thrive on new concepts and experimentation', 'Live to make things newer and better', 'Work well in ambiguity or unknowns', 'Feel stifled by established processes and the status quo', 'See endless possibilities and opportunities to invent']},
-    "Red - entertaining, humorous": {"verbs": ["animate", "amuse", "captivate", "cheer", "delight", "encourage", "energize", "engage", "enjoy", "enliven", "entertain", "excite", "express", "inspire", "joke", "motivate", "play", "stir", "uplift"], "adjectives": ["dynamic", "energetic", "engaging", "entertaining", "enthusiastic", "exciting", "fun", "lively", "magnetic", "playful", "humorous"], 
-     "beliefs": ['Energetic and uplifting', 'Motivated to entertain and create excitement', 'Magnetic and able to rally support for new concepts', 'Often naturally talented presenters and speakers', 'Sensitive to the mood and condition of others']},
-    "Blue - confident, influential": {"verbs": ["accomplish", "achieve", "affect", "assert", "cause", "command", "determine", "direct", "dominate", "drive", "empower", "establish", "guide", "impact", "impress", "influence", "inspire", "lead", "outpace", "outshine", "realize", "shape", "succeed", "transform", "win"], "adjectives": ["accomplished", "assertive", "confident", "decisive", "elite", "influential", "powerful", "prominent", "proven", "strong"], 
-     "beliefs": ['Achievement is paramount', 'Highly tolerant of risk and stress', 'Seeks influence and accomplishments', 'Comfortable making decisions with incomplete information', 'Set strategic visions and lead the way']},
-    "Pink - charming, elegant": {"verbs": ["arise", "aspire", "detail", "dream", "elevate", "enchant", "enrich", "envision", "exceed", "excel", "experience", "improve", "idealize", "imagine", "inspire", "perfect", "poise", "polish", "prepare", "refine", "uplift"], "adjectives": ["aesthetic", "charming", "classic", "dignified", "idealistic", "meticulous", "poised", "polished", "refined", "sophisticated", "elegant"], 
-     "beliefs": ['Hold high regard for tradition and excellence', 'Dream up and pursue refinement, beauty, and vitality', 'Typically highly detailed and very observant', 'Mess and disorder only deflates their enthusiasm']},
-    "Silver - rebellious, daring": {"verbs": ["activate", "campaign", "challenge", "commit", "confront", "dare", "defy", "disrupting", "drive", "excite", "face", "ignite", "incite", "influence", "inspire", "inspirit", "motivate", "move", "push", "rebel", "reimagine", "revolutionize", "rise", "spark", "stir", "fight", "free"], "adjectives": ["bold", "daring", "fearless", "independent", "non-conformist", "radical", "rebellious", "resolute", "unconventional", "valiant"], 
-     "beliefs": ['Rule breakers and establishment challengers', 'Have a low need to fit in with the pack', 'Value unconventional and independent thinking', 'Value freedom, boldness, and defiant ideas', 'Feel stifled by red tape and bureaucratic systems']},
-    "Beige - dedicated, humble": {"verbs": ["dedicate", "humble", "collaborate", "empower", "inspire", "empassion", "transform"], "adjectives": ["dedicated", "collaborative", "consistent", "empowering", "enterprising", "humble", "inspiring", "passionate", "proud", "traditional", "transformative"], 
-     "beliefs": ['There’s no need to differentiate from others', 'All perspectives are equally worth holding', 'Will not risk offending anyone', 'Light opinions are held quite loosely', 'Information tells enough of a story']},
-}
+placeholders = load_lexicon().placeholders
 
 def estimate_token_count(text):
-    tokens = tokenizer.tokenize(text)
-    return len(tokens)
-
-def chunk_html(html, max_tokens=25000):
-    soup = BeautifulSoup(html, "html.parser")
-    chunks = []
-    current_chunk = ""
-    current_length = 0
-
-    for element in soup.recursiveChildGenerator():
-        if isinstance(element, str):
-            tokens = tokenizer.tokenize(element)
-            if current_length + len(tokens) > max_tokens:
-                chunks.append(current_chunk)
-                current_chunk = ""
-                current_length = 0
-            current_chunk += element
-            current_length += len(tokens)
-        else:
-            if element.name in ['script', 'style']:
-                continue
-            if element.name in ['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-                element_str = str(element)
-                tokens = tokenizer.tokenize(element_str)
-                if current_length + len(tokens) > max_tokens:
-                    chunks.append(current_chunk)
-                    current_chunk = ""
-                    current_length = 0
-                current_chunk += element_str
-                current_length += len(tokens)
-
-    if current_chunk:
-        chunks.append(current_chunk)
-
-    return chunks
+    return count_tokens(text, ANALYSIS_MODEL)
 
 def analyze_text(html):
     summarized_placeholders = {
@@ -88,19 +43,16 @@ def analyze_text(html):
     prompt_base = "Please analyze the following HTML content and identify which verbs and adjectives from the following categories are present. Also, explain how these relate to the predefined beliefs of each category:\n\nCategories:\n" + "\n".join([f"{color}: Verbs({', '.join(info['verbs'])}), Adjectives({', '.join(info['adjectives'])})" for color, info in summarized_placeholders.items()]) + "\n\nHTML: "
 
     prompt_base_tokens = estimate_token_count(prompt_base)
-    html_chunks = chunk_html(html, max_tokens=128000 - prompt_base_tokens)
-    all_responses = []
-
-    for chunk in html_chunks:
-        prompt_html = prompt_base + chunk
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[
-                {"role": "user", "content": prompt_html}
-            ],
-        )
-        raw_content = response.choices[0].message.content
-        all_responses.append(raw_content)
+    html_chunks = chunk_html(html, max_tokens=content_budget(ANALYSIS_MODEL, prompt_base_tokens, MAX_OUTPUT_TOKENS), model=ANALYSIS_MODEL)
+    # Chunks are sent concurrently; responses come back in chunk order.
+    responses = rate_limit.call_all('groq', client.chat.completions.create, [dict(
+        model=ANALYSIS_MODEL,
+        messages=[
+            {"role": "user", "content": prompt_base + chunk.text}
+        ],
+        max_tokens=MAX_OUTPUT_TOKENS,
+    ) for chunk in html_chunks], cache=True)
+    all_responses = [response.choices[0].message.content for response in responses]
 
     return "\n".join(all_responses)
 
@@ -130,23 +82,21 @@ def generate_article(content, writing_styles, style_weights, user_prompt, keywor
         weight = style_weights[i]
         full_prompt += f"Modify {weight}% of the content in a {style.split(' - ')[1]} manner.\n"
 
-    full_prompt += "\nContent:\n" + content
+    full_prompt += "\nContent:\n"
 
     prompt_tokens = estimate_token_count(full_prompt)
-    content_tokens = 128000 - prompt_tokens
-    content_chunks = chunk_html(content, max_tokens=content_tokens)
-
-    revised_content = []
-    for chunk in content_chunks:
-        chunk_prompt = full_prompt + chunk
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": chunk_prompt}
-            ],
-        )
-        revised_content.append(response.choices[0].message.content)
+    content_tokens = content_budget(ANALYSIS_MODEL, prompt_tokens, MAX_OUTPUT_TOKENS)
+    content_chunks = chunk_html(content, max_tokens=content_tokens, model=ANALYSIS_MODEL)
+
+    responses = rate_limit.call_all('groq', client.chat.completions.create, [dict(
+        model=ANALYSIS_MODEL,
+        messages=[
+            {"role": "system", "content": "You are a helpful assistant."},
+            {"role": "user", "content": full_prompt + chunk.text}
+        ],
+        max_tokens=MAX_OUTPUT_TOKENS,
+    ) for chunk in content_chunks])
+    revised_content = [response.choices[0].message.content for response in responses]
 
     return "\n".join(revised_content)
 
@@ -173,17 +123,18 @@ st.markdown(hide_toolbar_css, unsafe_allow_html=True)
 
 # Scrape and analyze HTML file
 url_input = st.text_area("Paste comma-separated URLs here:", height=100)
-urls = [url.strip() for url in url_input.split(',')]
+urls = parse_url_list(url_input)
 
 if st.button("Scrape and Analyze URLs"):
-    for url in urls:
+    for result in unique_pages(fetch_all(urls)):
+        url = result.url
         try:
-            response = requests.get(url)
+            response = result.get()
             soup = BeautifulSoup(response.text, "html.parser")
             content = soup.get_text()
             raw_html = str(soup)
 
-            raw_analysis = analyze_text(raw_html)
+            raw_analysis = memoize(f"htmlag-analysis-{ANALYSIS_MODEL}-p{PROMPT_VERSION}-{load_lexicon().version}", response, lambda: analyze_text(raw_html))
             top_colors = match_text_to_color(raw_analysis)
 
             st.write(f"Content from URL: {url}")
@@ -241,7 +192,7 @@ if uploaded_revised_html_file is not None:
     if st.button("Revise Further"):
         revision_prompt = f"Revise the following content according to the specified revisions.\nRevisions: {revision_requests}\n\nContent:\n{revision_pasted_content}"
 
-        response = client.chat.completions.create(
+        response = rate_limit.call('groq', client.chat.completions.create,
             model="llama3-70b-8192",
             messages=[
                 {"role": "system", "content": "You are a helpful assistant."},
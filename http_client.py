@@ -0,0 +1,83 @@
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from rate_limit import host_limiter, parse_retry_after
+
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 20
+POOL_HOSTS = 16
+POOL_PER_HOST = 4
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RESPONSE_BYTES = 10 * 1024 * 1024
+CHUNK_SIZE = 1 << 16
+USER_AGENT = 'carnegieseo-audit/1.0'
+
+
+class ResponseTooLarge(requests.RequestException):
+    pass
+
+
+def make_session(max_retries=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR, pool_maxsize=POOL_PER_HOST):
+    # Keep-alive pool per host; connection errors, 429 and 5xx are retried with
+    # exponential backoff, honouring Retry-After. The last response is returned
+    # rather than raised so callers see the status as before.
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = make_session()
+        return _session
+
+
+def get(url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), max_bytes=MAX_RESPONSE_BYTES, session=None, **kwargs):
+    # Streams the body so an oversized page is abandoned after max_bytes instead
+    # of being held in memory; the returned Response behaves like requests.get's.
+    session = session or get_session()
+    host = (urlsplit(url).hostname or '').lower()
+    host_limiter.acquire(host)
+    response = session.get(url, timeout=timeout, stream=True, **kwargs)
+    if response.status_code in RETRY_STATUSES:
+        # Still limited after the adapter's retries: hold back every request to this host.
+        host_limiter.retry_after(host, parse_retry_after(response.headers.get('Retry-After')))
+    try:
+        length = response.headers.get('Content-Length')
+        if length and length.isdigit() and int(length) > max_bytes:
+            raise ResponseTooLarge(f"{url} is {length} bytes, limit is {max_bytes}", response=response)
+        chunks, size = [], 0
+        for chunk in response.iter_content(CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                raise ResponseTooLarge(f"{url} exceeds {max_bytes} bytes", response=response)
+            chunks.append(chunk)
+        response._content = b''.join(chunks)
+    finally:
+        response.close()
+    return response
@@ -1,13 +1,15 @@
 import pandas as pd
 import streamlit as st
-from bs4 import BeautifulSoup
-import requests
 from collections import Counter
 import openai
+import rate_limit
 import base64
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
+from fetching import fetch_all
+from canonical_urls import parse_url_list
+from html_text import paragraph_text
 
 if "OPENAI_API_KEY" not in st.secrets:
     st.error("Please set the OPENAI_API_KEY secret on the Streamlit dashboard.")
@@ -15,12 +17,8 @@ else:
     openai_api_key = st.secrets["OPENAI_API_KEY"]
     openai.api_key = openai_api_key
 
-def scrape_text(url):
-    response = requests.get(url)
-    soup = BeautifulSoup(response.content, 'html.parser')
-    paragraphs = soup.find_all('p')
-    text = " ".join([para.text for para in paragraphs])
-    return text
+def scrape_text(response):
+    return paragraph_text(response.content)
 
 def analyze_text(text, color_keywords):
     text = text.lower()
@@ -43,7 +41,7 @@ def generate_article(content, writing_styles, style_weights, user_prompt, keywor
             style_elements = style.split(' - ')
             style_description = style_elements[1] if len(style_elements) > 1 else style
             messages.append({"role": "assistant", "content": f"Modify {weight}% of the content in a {style_description} manner."})
-    response = openai.ChatCompletion.create(model="gpt-3.5-turbo", messages=messages)
+    response = rate_limit.call('openai', openai.ChatCompletion.create, model="gpt-3.5-turbo", messages=messages)
     revised_content = response.choices[0].message["content"].strip()
     revised_sentences = revised_content.split('. ')
     vectorizer = TfidfVectorizer().fit(revised_sentences)
@@ -79,15 +77,16 @@ if 'results' not in st.session_state:
     st.session_state.results = []
 
 if st.button("Analyze"):
-    urls = [url.strip() for url in url_input.split(",")]
-    results = []
-    for url in urls:
+    urls = parse_url_list(url_input)
+    results = [None] * len(urls)
+    for result in fetch_all(urls):
+        url = result.url
         try:
-            content = scrape_text(url)
+            content = scrape_text(result.get())
             top_colors = analyze_text(content, color_keywords)
-            results.append((url, content, *top_colors))
+            results[result.index] = (url, content, *top_colors)
         except:
-            results.append((url, "Error", "", ""))
+            results[result.index] = (url, "Error", "", "")
     st.session_state.results = results
     df = pd.DataFrame(results, columns=["URL", "Content", "Top Color", "Top Supporting Color", "Additional Supporting Color"])
     st.write(df)
@@ -1,12 +1,14 @@
 import streamlit as st
-from bs4 import BeautifulSoup
-import requests
 from collections import Counter
 import openai
+import rate_limit
 import base64
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
+from fetching import fetch_all
+from canonical_urls import parse_url_list
+from html_text import paragraph_text
 
 if "OPENAI_API_KEY" not in st.secrets:
     st.error("Please set the OPENAI_API_KEY secret on the Streamlit dashboard.")
@@ -14,12 +16,8 @@ else:
     openai_api_key = st.secrets["OPENAI_API_KEY"]
     openai.api_key = openai_api_key
 
-def scrape_text(url):
-    response = requests.get(url)
-    soup = BeautifulSoup(response.content, 'html.parser')
-    paragraphs = soup.find_all('p')
-    text = " ".join([para.text for para in paragraphs])
-    return text
+def scrape_text(response):
+    return paragraph_text(response.content)
 
 def analyze_text(text, color_keywords):
     text = text.lower()
@@ -40,7 +38,7 @@ def generate_article(content, writing_styles, style_weights, user_prompt, keywor
         for i, style in enumerate(writing_styles):
             weight = style_weights[i]
             messages.append({"role": "assistant", "content": f"Modify {weight}% of the content in a {style.split(' - ')[1]} manner."})
-    response = openai.ChatCompletion.create(model="gpt-3.5-turbo", messages=messages)
+    response = rate_limit.call('openai', openai.ChatCompletion.create, model="gpt-3.5-turbo", messages=messages)
     revised_content = response.choices[0].message["content"].strip()
     revised_sentences = revised_content.split('. ')
     vectorizer = TfidfVectorizer().fit(revised_sentences)
@@ -72,15 +70,16 @@ color_keywords = {
 url_input = st.text_area("Paste a list of comma-separated URLs:")
 
 if st.button("Analyze"):
-    urls = [url.strip() for url in url_input.split(",")]
-    results = []
-    for url in urls:
+    urls = parse_url_list(url_input)
+    results = [None] * len(urls)
+    for result in fetch_all(urls):
+        url = result.url
         try:
-            content = scrape_text(url)
+            content = scrape_text(result.get())
             top_colors = analyze_text(content, color_keywords)
-            results.append((url, content, *top_colors))
+            results[result.index] = (url, content, *top_colors)
         except:
-            results.append((url, "Error", "", ""))
+            results[result.index] = (url, "Error", "", "")
     st.session_state.results = results
     df = pd.DataFrame(results, columns=["URL", "Top Color", "Top Supporting Color", "Additional Supporting Color"])
     st.write(df)
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+from functools import lru_cache
+from types import MappingProxyType
+
+from scoring import WORD_RE
+
+SCHEMA_VERSION = 1
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_PATH = os.path.join(BASE_DIR, 'persona_lexicon.py')
+ARTIFACT_PATH = os.path.join(BASE_DIR, 'persona_lexicon.json')
+
+
+def source_hash():
+    with open(SOURCE_PATH, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _unique_lower(terms):
+    return list(dict.fromkeys(term.lower() for term in terms))
+
+
+def _term_index(color_terms):
+    # Each term gets a bitmask with one bit per color, in color order.
+    colors = list(color_terms)
+    masks = {}
+    for bit, color in enumerate(colors):
+        for term in color_terms[color]:
+            masks[term] = masks.get(term, 0) | (1 << bit)
+    phrases = {}
+    for term in masks:
+        tokens = WORD_RE.findall(term)
+        if len(tokens) > 1:
+            phrases[term] = tokens
+    return {'colors': colors, 'masks': masks, 'phrases': phrases}
+
+
+def compile_lexicon():
+    import persona_lexicon
+
+    color_keywords = {color: _unique_lower(keywords) for color, keywords in persona_lexicon.color_keywords.items()}
+    placeholders = {
+        color: {
+            'verbs': _unique_lower(traits['verbs']),
+            'adjectives': _unique_lower(traits['adjectives']),
+            'beliefs': list(traits['beliefs']),
+        } for color, traits in persona_lexicon.placeholders.items()
+    }
+    data = {
+        'schema': SCHEMA_VERSION,
+        'color_keywords': color_keywords,
+        'placeholders': placeholders,
+        'color_profiles': persona_lexicon.color_profiles,
+        'color_to_hex': persona_lexicon.color_to_hex,
+        'keyword_index': _term_index(color_keywords),
+        'persona_index': _term_index({
+            color: traits['verbs'] + traits['adjectives'] for color, traits in placeholders.items()
+        }),
+    }
+    data['version'] = hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()[:16]
+    data['source_hash'] = source_hash()
+    return data
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class TermIndex:
+    def __init__(self, data):
+        self.colors = tuple(data['colors'])
+        self.masks = MappingProxyType(dict(data['masks']))
+        self.phrases = MappingProxyType({term: tuple(tokens) for term, tokens in data['phrases'].items()})
+
+    def colors_for(self, mask):
+        return tuple(color for bit, color in enumerate(self.colors) if mask >> bit & 1)
+
+
+class Lexicon:
+    def __init__(self, data):
+        self.version = data['version']
+        self.color_keywords = _freeze(data['color_keywords'])
+        self.placeholders = _freeze(data['placeholders'])
+        self.color_profiles = _freeze(data['color_profiles'])
+        self.color_to_hex = _freeze(data['color_to_hex'])
+        self.keyword_index = TermIndex(data['keyword_index'])
+        self.persona_index = TermIndex(data['persona_index'])
+
+
+def _read_artifact():
+    try:
+        with open(ARTIFACT_PATH, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # A stale artifact (source edited without rebuilding) is ignored rather than trusted.
+    if data.get('schema') != SCHEMA_VERSION or data.get('source_hash') != source_hash():
+        return None
+    return data
+
+
+@lru_cache(maxsize=1)
+def load_lexicon():
+    data = _read_artifact()
+    if data is None:
+        data = compile_lexicon()
+    return Lexicon(data)
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+LLM_CACHE_DB = os.environ.get('LLM_CACHE_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.llm_cache.sqlite'))
+# Entries older than this are recomputed; the least recently used go first
+# once the cache outgrows MAX_BYTES.
+TTL = float(os.environ.get('LLM_CACHE_TTL', 30 * 24 * 3600))
+MAX_BYTES = int(os.environ.get('LLM_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    model TEXT,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+"""
+
+
+def _normalize(value):
+    # Text is compared without surrounding whitespace and dict keys
+    # case-insensitively, so cosmetic differences still hit.
+    if isinstance(value, dict):
+        return {str(k).lower(): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def endpoint_of(function):
+    # openai.ChatCompletion.create -> 'ChatCompletion.create'; a client method
+    # such as groq's chat.completions.create -> 'Completions.create'.
+    owner = getattr(function, '__self__', None)
+    if owner is None:
+        return function.__qualname__
+    owner = owner if isinstance(owner, type) else type(owner)
+    return f"{owner.__name__}.{function.__name__}"
+
+
+def request_key(provider, function, args, kwargs):
+    request = {
+        'provider': provider,
+        'endpoint': endpoint_of(function),
+        'model': kwargs.get('model') or kwargs.get('engine'),
+        'messages': _normalize(kwargs.get('messages')),
+        'prompt': _normalize(kwargs.get('prompt')),
+        'temperature': kwargs.get('temperature'),
+        'max_tokens': kwargs.get('max_tokens'),
+        'other': _normalize({k: v for k, v in kwargs.items()
+                             if k not in ('model', 'engine', 'messages', 'prompt', 'temperature', 'max_tokens')}),
+        'args': _normalize(list(args)),
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True, default=repr).encode('utf-8')).hexdigest()
+
+
+def cacheable(kwargs):
+    # Streaming responses cannot be replayed, and a request sampled at a
+    # temperature above 0 (or for several choices) asks for fresh text each
+    # time, so neither is cached even when the caller passes cache=True.
+    if kwargs.get('stream') or (kwargs.get('n') or 1) > 1:
+        return False
+    return not (kwargs.get('temperature') or 0) > 0
+
+
+class LLMCache:
+    # Disk-backed cache of LLM responses shared by every app and session.
+    # Responses are pickled as returned by the client, so callers read them
+    # exactly as they would a fresh one.
+    def __init__(self, path=LLM_CACHE_DB, ttl=TTL, max_bytes=MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        # Running total of stored bytes, summed once on the first put.
+        self._bytes = None
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute('SELECT value, created FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                self._delete(key, len(row[0]))
+                self.expired += 1
+                row = None
+            value = None
+            if row is not None:
+                try:
+                    value = pickle.loads(row[0])
+                except Exception:
+                    # Unreadable (e.g. pickled by an incompatible client version).
+                    self._delete(key, len(row[0]))
+            if value is None:
+                self.misses += 1
+                return None
+            self._conn.execute('UPDATE responses SET accessed = ?, hits = hits + 1 WHERE key = ?', (now, key))
+            self.hits += 1
+        return value
+
+    def put(self, key, provider, model, value):
+        try:
+            data = pickle.dumps(value)
+        except Exception:
+            return
+        now = time.time()
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+            replaced = self._conn.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, provider, model, value, size, created, accessed) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', (key, provider, model, data, len(data), now, now))
+            self._bytes += len(data) - (replaced[0] if replaced else 0)
+            self._evict()
+
+    def _delete(self, key, size):
+        self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+        if self._bytes is not None:
+            self._bytes -= size
+
+    def _evict(self):
+        if self._bytes <= self.max_bytes:
+            return
+        for key, size in self._conn.execute('SELECT key, size FROM responses ORDER BY accessed').fetchall():
+            if self._bytes <= self.max_bytes:
+                break
+            self._delete(key, size)
+            self.evictions += 1
+
+    def call(self, provider, function, args, kwargs, compute):
+        if not cacheable(kwargs):
+            return compute()
+        key = request_key(provider, function, args, kwargs)
+        response = self.get(key)
+        if response is None:
+            response = compute()
+            self.put(key, provider, kwargs.get('model') or kwargs.get('engine'), response)
+        return response
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'entries': entries,
+            'bytes': size,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM responses')
+            self._bytes = 0
+
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMCache()
+        return _llm_cache
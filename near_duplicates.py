@@ -0,0 +1,118 @@
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+from scoring import WORD_RE
+
+NUM_PERM = 128
+BANDS = 16
+SHINGLE_SIZE = 3
+# Estimated Jaccard similarity of word shingles at which two pages count as
+# the same page. 16 bands of 8 rows make pairs above ~0.7 likely candidates.
+THRESHOLD = 0.8
+# Universal hashing (a*x + b) mod P over 32-bit shingle hashes; a < 2**31 keeps
+# a*x + b inside uint64.
+PRIME = np.uint64(4294967291)
+_rng = np.random.RandomState(7)
+_A = _rng.randint(1, 2 ** 31, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, 2 ** 31, size=NUM_PERM, dtype=np.uint64)
+EMPTY_SIGNATURE = np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+
+
+def shingle_hashes(text, size=SHINGLE_SIZE):
+    words = WORD_RE.findall(text.lower())
+    if len(words) < size:
+        shingles = {' '.join(words)} if words else set()
+    else:
+        shingles = {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+
+def minhash(text):
+    hashes = shingle_hashes(text)
+    if not len(hashes):
+        return EMPTY_SIGNATURE.copy()
+    return ((np.outer(hashes, _A) + _B) % PRIME).min(axis=0)
+
+
+def similarity(signature, other):
+    return float(np.mean(signature == other))
+
+
+class NearDuplicateIndex:
+    # LSH over MinHash signatures. add() returns the key of an earlier page this
+    # one nearly duplicates (its representative), or None if it is new, in which
+    # case it becomes a representative itself.
+    def __init__(self, threshold=THRESHOLD, bands=BANDS):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self.buckets = defaultdict(list)
+        self.signatures = {}
+        self.representative = {}
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def query(self, signature):
+        best, best_similarity = None, self.threshold
+        seen = set()
+        for band_key in self._band_keys(signature):
+            for key in self.buckets.get(band_key, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                score = similarity(signature, self.signatures[key])
+                if score >= best_similarity:
+                    best, best_similarity = key, score
+        return best
+
+    def add(self, key, signature):
+        if key in self.representative:
+            return self.representative[key]
+        if (signature == EMPTY_SIGNATURE).all():
+            self.representative[key] = None
+            return None
+        match = self.query(signature)
+        self.representative[key] = match
+        if match is None:
+            self.signatures[key] = signature
+            for band_key in self._band_keys(signature):
+                self.buckets[band_key].append(key)
+        return match
+
+    def groups(self):
+        groups = defaultdict(list)
+        for key, match in self.representative.items():
+            groups[match or key].append(key)
+        return dict(groups)
+
+
+class SharedAnalysis:
+    # Runs an expensive analysis once per group of near-duplicate texts; later
+    # members of the group get the representative's result and its key.
+    def __init__(self, threshold=THRESHOLD):
+        self.index = NearDuplicateIndex(threshold)
+        self.results = {}
+        self.signatures = {}
+
+    def seed(self, key, signature, result):
+        # Restores a page analyzed in an earlier run from its stored signature,
+        # so its near-duplicates share its result instead of being analyzed again.
+        signature = np.asarray(signature, dtype=np.uint64)
+        self.signatures[key] = signature
+        self.index.add(key, signature)
+        self.results[key] = result
+
+    def run(self, key, text, compute):
+        signature = self.signatures[key] = minhash(text)
+        duplicate_of = self.index.add(key, signature)
+        if duplicate_of is not None and duplicate_of in self.results:
+            result = self.results[duplicate_of]
+        else:
+            duplicate_of = None
+            result = compute()
+        self.results[key] = result
+        return result, duplicate_of
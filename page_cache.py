@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+import http_client
+from canonical_urls import normalize_url
+
+CACHE_DIR = os.environ.get('PAGE_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.page_cache'))
+# Stored analyses are evicted least recently used first once they outgrow
+# this; eviction trims them to RESULTS_LOW_WATER of the limit.
+RESULTS_MAX_BYTES = int(os.environ.get('PAGE_CACHE_RESULTS_MAX_BYTES', 1024 * 1024 * 1024))
+RESULTS_LOW_WATER = 0.9
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class PageCache:
+    # Bodies are stored once under their sha256; per-URL metadata points at the
+    # current body and carries the validators for conditional requests. Results
+    # computed from a body are stored under the same hash, so a page that has
+    # not changed since the last audit is neither downloaded nor re-analyzed.
+    def __init__(self, root=CACHE_DIR, results_max_bytes=RESULTS_MAX_BYTES):
+        self.root = root
+        self.results_max_bytes = results_max_bytes
+        self._lock = threading.Lock()
+        self._results_bytes = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _meta_path(self, url):
+        return os.path.join(self.root, 'pages', _sha256(normalize_url(url).encode()) + '.json')
+
+    def _body_path(self, content_hash):
+        return os.path.join(self.root, 'bodies', content_hash[:2], content_hash)
+
+    def _result_path(self, name, content_hash):
+        return os.path.join(self.root, 'results', name, content_hash + '.pickle')
+
+    def lookup(self, url):
+        try:
+            with open(self._meta_path(url), encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(self._body_path(meta['content_hash']), 'rb') as f:
+                return meta, f.read()
+        except (OSError, ValueError, KeyError):
+            return None, None
+
+    def store(self, url, response):
+        content_hash = _sha256(response.content)
+        body_path = self._body_path(content_hash)
+        if not os.path.exists(body_path):
+            _write_atomic(body_path, response.content)
+        meta = {
+            'url': normalize_url(url),
+            'content_hash': content_hash,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_type': response.headers.get('Content-Type'),
+            'encoding': response.encoding,
+            'fetched_at': time.time(),
+        }
+        _write_atomic(self._meta_path(url), json.dumps(meta).encode('utf-8'))
+        return content_hash
+
+    def fetch(self, url, fetch=http_client.get):
+        # Revalidates a cached page with If-None-Match / If-Modified-Since. On 304
+        # the cached body is returned in place of the empty one. The response gains
+        # content_hash and from_cache attributes either way.
+        meta, body = self.lookup(url)
+        headers = {}
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        response = fetch(url, headers=headers) if headers else fetch(url)
+        if response.status_code == 304 and meta:
+            response._content = body
+            response.status_code = 200
+            response.encoding = meta.get('encoding')
+            if meta.get('content_type'):
+                response.headers['Content-Type'] = meta['content_type']
+            response.content_hash = meta['content_hash']
+            response.from_cache = True
+            with self._lock:
+                self.hits += 1
+            return response
+        response.from_cache = False
+        response.content_hash = self.store(url, response) if response.status_code == 200 else _sha256(response.content)
+        with self._lock:
+            self.misses += 1
+        return response
+
+    def _result_files(self):
+        for directory, _, files in os.walk(os.path.join(self.root, 'results')):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield stat.st_mtime, stat.st_size, path
+
+    def _evict_results(self, added):
+        # Recency is the file's mtime, refreshed on every hit.
+        with self._lock:
+            if self._results_bytes is None:
+                self._results_bytes = sum(size for _, size, _ in self._result_files())
+            else:
+                self._results_bytes += added
+            if self._results_bytes <= self.results_max_bytes:
+                return
+            target = self.results_max_bytes * RESULTS_LOW_WATER
+            for _, size, path in sorted(self._result_files()):
+                if self._results_bytes <= target:
+                    break
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                self._results_bytes -= size
+                self.evictions += 1
+
+    def cached_result(self, name, content_hash):
+        # (True, value) for a stored result, else (False, None).
+        path = self._result_path(name, content_hash)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path)
+            return True, value
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return False, None
+
+    def store_result(self, name, content_hash, value):
+        data = pickle.dumps(value)
+        _write_atomic(self._result_path(name, content_hash), data)
+        self._evict_results(len(data))
+
+    def result(self, name, content_hash, compute):
+        found, value = self.cached_result(name, content_hash)
+        if not found:
+            value = compute()
+            self.store_result(name, content_hash, value)
+        return value
+
+
+_page_cache = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache():
+    global _page_cache
+    with _page_cache_lock:
+        if _page_cache is None:
+            _page_cache = PageCache()
+        return _page_cache
+
+
+def cached_get(url):
+    return get_page_cache().fetch(url)
+
+
+def content_hash(source):
+    if isinstance(source, str):
+        source = source.encode('utf-8')
+    if isinstance(source, bytes):
+        return _sha256(source)
+    return getattr(source, 'content_hash', None) or _sha256(source.content)
+
+
+def memoize(name, source, compute):
+    # Computes an analysis once per distinct source, a fetched response or the
+    # text extracted from it; name should change whenever the analysis itself
+    # does (e.g. include the lexicon version).
+    return get_page_cache().result(name, content_hash(source), compute)
+
+
+def memoize_all(name, sources, compute_all):
+    # Batch form of memoize: compute_all receives only the sources with no
+    # stored result and returns theirs in the same order, so the misses can be
+    # computed together (e.g. in a process pool). None results are not stored.
+    cache = get_page_cache()
+    hashes = [content_hash(source) for source in sources]
+    values, missing = [], []
+    for i, key in enumerate(hashes):
+        found, value = cache.cached_result(name, key)
+        values.append(value)
+        if not found:
+            missing.append(i)
+    if missing:
+        for i, value in zip(missing, compute_all([sources[i] for i in missing])):
+            values[i] = value
+            if value is not None:
+                cache.store_result(name, hashes[i], value)
+    return values
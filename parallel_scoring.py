@@ -0,0 +1,88 @@
+import math
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from boilerplate import content_blocks
+from lexicon import load_lexicon
+from scoring import WORD_RE, lexicon_automaton
+
+# Below this many documents the pool start-up costs more than it saves.
+MIN_PARALLEL_DOCUMENTS = 200
+SHARDS_PER_WORKER = 4
+
+_automaton = None
+
+
+def _init_worker(index_name, stem):
+    # Each worker loads the compiled lexicon artifact once; tasks only carry text.
+    global _automaton
+    _automaton = lexicon_automaton(index_name, stem)
+
+
+def _score_shard(documents):
+    return [_automaton.score(document) for document in documents]
+
+
+def _term_count_shard(documents):
+    return [dict(_automaton.term_counts(WORD_RE.findall(document.lower()))) for document in documents]
+
+
+def _extract_shard(pages):
+    # Content blocks of each page's HTML, or None for a page that fails to parse.
+    blocks = []
+    for html in pages:
+        try:
+            blocks.append(content_blocks(html))
+        except Exception:
+            blocks.append(None)
+    return blocks
+
+
+def _shards(documents, workers):
+    size = max(1, math.ceil(len(documents) / (workers * SHARDS_PER_WORKER)))
+    return [documents[i:i + size] for i in range(0, len(documents), size)]
+
+
+_executor = None
+_executor_key = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(index_name='keyword_index', stem=False, workers=None):
+    # One pool serves every audit in the process. It is only replaced when the
+    # worker count, index, stemming or lexicon version it was started with changes.
+    global _executor, _executor_key
+    key = (workers, index_name, stem, load_lexicon().version)
+    with _executor_lock:
+        if _executor_key != key:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(index_name, stem))
+            _executor_key = key
+        return _executor
+
+
+def map_documents(task, documents, index_name='keyword_index', stem=False, workers=None):
+    # Runs task over shards of documents and returns per-document results in input order.
+    documents = list(documents)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(documents) < MIN_PARALLEL_DOCUMENTS:
+        _init_worker(index_name, stem)
+        return task(documents)
+    executor = get_executor(index_name, stem, workers)
+    return [result for shard in executor.map(task, _shards(documents, workers)) for result in shard]
+
+
+def score_parallel(documents, index_name='keyword_index', stem=False, workers=None):
+    return map_documents(_score_shard, documents, index_name, stem, workers)
+
+
+def term_counts_parallel(documents, index_name='keyword_index', stem=False, workers=None):
+    return map_documents(_term_count_shard, documents, index_name, stem, workers)
+
+
+def extract_blocks_parallel(pages, index_name='keyword_index', stem=False, workers=None):
+    # Block extraction for many pages' HTML. index_name and stem only select the
+    # pool, so extraction and the scoring that follows share one.
+    return map_documents(_extract_shard, pages, index_name, stem, workers)
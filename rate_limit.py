@@ -0,0 +1,173 @@
+import email.utils
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from llm_cache import get_llm_cache
+
+# Requests per second and burst size for each remote host.
+HOST_RATE = 5
+HOST_BURST = 5
+# Requests per second, burst size and calls in flight for each LLM provider.
+PROVIDER_LIMITS = {
+    'openai': (500 / 60, 10, 8),
+    'groq': (30 / 60, 3, 4),
+}
+DEFAULT_PROVIDER_LIMIT = (60 / 60, 5, 4)
+# LLM calls one page may have in flight at once; the provider's own
+# concurrency limit still applies across pages and apps.
+CHUNK_CONCURRENCY = 4
+MAX_ATTEMPTS = 5
+MAX_RETRY_AFTER = 300
+
+
+def parse_retry_after(value, now=None):
+    # Retry-After is either delta-seconds or an HTTP date.
+    if value is None:
+        return None
+    value = str(value).strip()
+    if value.replace('.', '', 1).isdigit():
+        return min(float(value), MAX_RETRY_AFTER)
+    try:
+        when = email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return min(max(0.0, when - (time.time() if now is None else now)), MAX_RETRY_AFTER)
+
+
+class TokenBucket:
+    # Thread-safe token bucket. A caller reserves its token up front and sleeps
+    # off any deficit outside the lock, so concurrent callers queue behind each
+    # other at exactly the refill rate instead of waking together.
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = capacity
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def reserve(self, tokens=1):
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self.tokens -= tokens
+            return max(0.0, self.updated - now) + max(0.0, -self.tokens / self.rate)
+
+    def acquire(self, tokens=1):
+        wait = self.reserve(tokens)
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        # Honours Retry-After: nothing refills until the pause is over, and
+        # everyone already queued waits behind it.
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self.updated = max(self.updated, now + seconds)
+            self.tokens = min(self.tokens, 0)
+
+
+class RateLimiter:
+    # One token bucket (and optionally a concurrency cap) per key: a host name
+    # for page fetches, a provider name for LLM calls.
+    def __init__(self, rate, capacity, concurrency=None, limits=None):
+        self.default = (rate, capacity, concurrency)
+        self.limits = dict(limits or {})
+        self.buckets = {}
+        self.semaphores = {}
+        self._lock = threading.Lock()
+
+    def configure(self, key, rate, capacity, concurrency=None):
+        with self._lock:
+            self.limits[key] = (rate, capacity, concurrency)
+            self.buckets.pop(key, None)
+            self.semaphores.pop(key, None)
+
+    def bucket(self, key):
+        with self._lock:
+            if key not in self.buckets:
+                rate, capacity, concurrency = self.limits.get(key, self.default)
+                self.buckets[key] = TokenBucket(rate, capacity)
+                self.semaphores[key] = threading.BoundedSemaphore(concurrency) if concurrency else None
+            return self.buckets[key]
+
+    def acquire(self, key, tokens=1):
+        return self.bucket(key).acquire(tokens)
+
+    def retry_after(self, key, seconds):
+        if seconds:
+            self.bucket(key).pause(seconds)
+
+    @contextmanager
+    def limit(self, key):
+        bucket = self.bucket(key)
+        semaphore = self.semaphores[key]
+        if semaphore is not None:
+            semaphore.acquire()
+        try:
+            bucket.acquire()
+            yield
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+
+host_limiter = RateLimiter(HOST_RATE, HOST_BURST)
+provider_limiter = RateLimiter(*DEFAULT_PROVIDER_LIMIT, limits=PROVIDER_LIMITS)
+
+
+def _rate_limit_delay(error, attempt):
+    # openai<1 errors carry http_status/headers; openai>=1 and groq errors carry
+    # status_code and the response.
+    status = getattr(error, 'http_status', None) or getattr(error, 'status_code', None)
+    if status not in (429, 503) and type(error).__name__ != 'RateLimitError':
+        return None
+    headers = getattr(error, 'headers', None) or getattr(getattr(error, 'response', None), 'headers', None) or {}
+    delay = parse_retry_after(headers.get('Retry-After') or headers.get('retry-after'))
+    return delay if delay is not None else min(2 ** attempt, MAX_RETRY_AFTER)
+
+
+def call(provider, function, *args, cache=False, **kwargs):
+    # Runs an LLM API call within the provider's rate and concurrency limits,
+    # retrying rate-limit errors after the server's Retry-After. With cache=True
+    # a request made before is answered from the LLM cache without touching the
+    # limits; only analysis calls opt in, so generators still get fresh text.
+    if not cache:
+        return _call(provider, function, *args, **kwargs)
+    return get_llm_cache().call(provider, function, args, kwargs, lambda: _call(provider, function, *args, **kwargs))
+
+
+def _call(provider, function, *args, **kwargs):
+    for attempt in range(MAX_ATTEMPTS):
+        with provider_limiter.limit(provider):
+            try:
+                return function(*args, **kwargs)
+            except Exception as e:
+                delay = _rate_limit_delay(e, attempt)
+                if delay is None or attempt == MAX_ATTEMPTS - 1:
+                    raise
+        provider_limiter.retry_after(provider, delay)
+
+
+def call_all(provider, function, calls, max_in_flight=CHUNK_CONCURRENCY, cache=False):
+    # Runs one call per kwargs dict in calls concurrently, at most max_in_flight
+    # at a time, and returns the responses in the order of calls.
+    calls = list(calls)
+    if len(calls) <= 1 or max_in_flight <= 1:
+        return [call(provider, function, cache=cache, **kwargs) for kwargs in calls]
+    executor = ThreadPoolExecutor(max_workers=min(max_in_flight, len(calls)))
+    try:
+        return list(executor.map(lambda kwargs: call(provider, function, cache=cache, **kwargs), calls))
+    finally:
+        # On an error the chunks not yet sent are dropped rather than paid for.
+        executor.shutdown(wait=False, cancel_futures=True)
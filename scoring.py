@@ -0,0 +1,233 @@
+import re
+from collections import Counter
+from functools import lru_cache
+
+WORD_RE = re.compile(r'\b\w+\b')
+
+STEM_SUFFIXES = ('ing', 'ed', 'es', 's')
+STEM_EXCEPTIONS = frozenset(['news', 'this', 'thus', 'always', 'series', 'species', 'campus', 'status'])
+# Stems shorter than this ('car', 'win') are too ambiguous to match on alone.
+MIN_STEM_CHARS = 4
+FORM_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=65536)
+def stem_word(word):
+    # Light suffix stripping so 'empowering', 'explored' and 'nurtures' meet their
+    # base forms. Too coarse to match on by itself ('care' -> 'car'); WordForms
+    # only falls back to it when the stem is long and names one lexicon word.
+    if len(word) <= 3 or word in STEM_EXCEPTIONS:
+        return word
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith('ied'):
+        return word[:-3] + 'y'
+    for suffix in STEM_SUFFIXES:
+        if word.endswith(suffix) and not word.endswith('ss') and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            if len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'lsz':
+                word = word[:-1]
+            break
+    if word.endswith('e') and len(word) > 3:
+        word = word[:-1]
+    return word
+
+
+def base_forms(word):
+    # Words that word may be an inflection of, most likely first: 'caring' ->
+    # 'care', 'winning' -> 'win', 'wines' -> 'wine'. A bare base is only offered
+    # when it keeps MIN_STEM_CHARS, so 'caring' never yields 'car'.
+    if len(word) <= 3 or word in STEM_EXCEPTIONS:
+        return
+    if word.endswith(('ies', 'ied')):
+        yield word[:-3] + 'y'
+    if word.endswith('s') and not word.endswith('ss'):
+        yield word[:-1]
+        if word.endswith('es') and word[:-2].endswith(('s', 'x', 'z', 'ch', 'sh', 'o')):
+            yield word[:-2]
+    for suffix in ('ing', 'ed'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            base = word[:-len(suffix)]
+            if base[-1] == base[-2] and base[-1] not in 'aeioulsz':
+                yield base[:-1]
+            yield base + 'e'
+            if len(base) >= MIN_STEM_CHARS or base[-1] == base[-2]:
+                yield base
+
+
+class WordForms:
+    # Maps words onto lexicon headwords for stem=True matching. Headwords keep
+    # their own form, so unrelated entries such as 'care' and 'car' or 'wine' and
+    # 'win' never merge; a headword that is an inflection of another ('inspiring',
+    # 'inspired' -> 'inspire') joins that word's family. Other words resolve
+    # through their base forms, then through a stem shared by one family only.
+    def __init__(self, headwords):
+        self.roots = {}
+        # Base forms are shorter than the word, so they are resolved first.
+        for word in sorted(headwords, key=lambda word: (len(word), word)):
+            self.roots[word] = next((self.roots[base] for base in base_forms(word) if base in self.roots), word)
+        self.stems = {}
+        for word, root in self.roots.items():
+            self.stems.setdefault(stem_word(word), set()).add(root)
+        self._cache = {}
+
+    def resolve(self, word):
+        roots = self.roots
+        if word in roots:
+            return roots[word]
+        for base in base_forms(word):
+            if base in roots:
+                return roots[base]
+        stem = stem_word(word)
+        families = self.stems.get(stem, ())
+        if len(stem) >= MIN_STEM_CHARS and len(families) == 1:
+            return next(iter(families))
+        return word
+
+    def __call__(self, word):
+        form = self._cache.get(word)
+        if form is None:
+            if len(self._cache) >= FORM_CACHE_SIZE:
+                self._cache.clear()
+            form = self._cache[word] = self.resolve(word)
+        return form
+
+
+class KeywordAutomaton:
+    # Maps every lowercased keyword to the colors it scores for. A keyword listed
+    # twice under one color scores twice, the same as summing words.count() did.
+    # Multi-word and hyphenated keywords ("press on", "leading-edge") are matched
+    # as token sequences through a trie keyed on their first token. With stem=True
+    # keywords and page tokens are both resolved through WordForms before matching.
+    def __init__(self, color_keywords, stem=False):
+        self.stem = stem
+        self.colors = list(color_keywords)
+        term_colors = {}
+        for color, keywords in color_keywords.items():
+            for keyword in keywords:
+                term_colors.setdefault(keyword.lower(), []).append(color)
+        self._build({term: tuple(colors) for term, colors in term_colors.items()})
+
+    @classmethod
+    def from_index(cls, index, stem=False):
+        automaton = cls.__new__(cls)
+        automaton.stem = stem
+        automaton.colors = list(index.colors)
+        automaton._build({term: index.colors_for(mask) for term, mask in index.masks.items()})
+        return automaton
+
+    def _build(self, term_colors):
+        self.term_colors = {}
+        self.table = {}
+        self.trie = {}
+        term_tokens = {term: WORD_RE.findall(term) for term in term_colors}
+        if self.stem:
+            self.forms = WordForms({token for tokens in term_tokens.values() for token in tokens})
+        for term, colors in term_colors.items():
+            tokens = term_tokens[term]
+            if not tokens:
+                continue
+            if self.stem:
+                tokens = [self.forms(token) for token in tokens]
+            if len(tokens) == 1:
+                key = tokens[0]
+                self.table[key] = self._merge_colors(key, colors)
+                continue
+            # Trie entries are [term ending here or None, next-token children].
+            children = self.trie
+            for token in tokens[:-1]:
+                children = children.setdefault(token, [None, {}])[1]
+            entry = children.setdefault(tokens[-1], [None, {}])
+            if entry[0] is None:
+                entry[0] = term
+            self._merge_colors(entry[0], colors)
+
+    def _merge_colors(self, key, colors):
+        # Keywords of one word family share a key; each color still scores once per hit.
+        if key in self.term_colors:
+            colors = tuple(dict.fromkeys(self.term_colors[key] + colors))
+        self.term_colors[key] = colors
+        return colors
+
+    def phrase_spans(self, tokens):
+        # Yields (start, end, term) token spans for every phrase occurrence.
+        trie = self.trie
+        n = len(tokens)
+        for i, token in enumerate(tokens):
+            entry = trie.get(token)
+            j = i + 1
+            while entry is not None:
+                term, children = entry
+                if term is not None:
+                    yield i, j, term
+                if j == n:
+                    break
+                entry = children.get(tokens[j])
+                j += 1
+
+    def matches(self, tokens):
+        if self.stem:
+            tokens = [self.forms(token) for token in tokens]
+        table = self.table
+        for i, token in enumerate(tokens):
+            if token in table:
+                yield i, i + 1, token
+        if self.trie:
+            yield from self.phrase_spans(tokens)
+
+    def term_counts(self, tokens):
+        counts = Counter(tokens)
+        if self.stem:
+            # Each distinct token is stemmed once; the sequence is only rebuilt for phrases.
+            forms = self.forms
+            stems = {token: forms(token) for token in counts}
+            stem_counts = Counter()
+            for token, count in counts.items():
+                stem_counts[stems[token]] += count
+            counts = stem_counts
+            if self.trie and not self.trie.keys().isdisjoint(counts):
+                tokens = [stems[token] for token in tokens]
+        term_counts = Counter({token: counts[token] for token in self.table.keys() & counts.keys()})
+        # The sequence walk only runs when some phrase's first token occurs at all.
+        if self.trie and not self.trie.keys().isdisjoint(counts):
+            term_counts.update(term for _, _, term in self.phrase_spans(tokens))
+        return term_counts
+
+    def score_tokens(self, tokens):
+        color_counts = Counter({color: 0 for color in self.colors})
+        term_colors = self.term_colors
+        for term, count in self.term_counts(tokens).items():
+            for color in term_colors[term]:
+                color_counts[color] += count
+        return color_counts
+
+    def score(self, text):
+        return self.score_tokens(WORD_RE.findall(text.lower()))
+
+
+@lru_cache(maxsize=32)
+def _compile(key, stem):
+    return KeywordAutomaton({color: keywords for color, keywords in key}, stem=stem)
+
+
+@lru_cache(maxsize=8)
+def _lexicon_automaton(version, index_name, stem):
+    from lexicon import load_lexicon
+
+    return KeywordAutomaton.from_index(getattr(load_lexicon(), index_name), stem=stem)
+
+
+def lexicon_automaton(index_name='keyword_index', stem=False):
+    from lexicon import load_lexicon
+
+    return _lexicon_automaton(load_lexicon().version, index_name, stem)
+
+
+def get_automaton(color_keywords=None, stem=False):
+    if color_keywords is None:
+        return lexicon_automaton(stem=stem)
+    return _compile(tuple((color, tuple(keywords)) for color, keywords in color_keywords.items()), stem)
+
+
+def score_text(text, color_keywords=None, stem=False):
+    return get_automaton(color_keywords, stem).score(text)
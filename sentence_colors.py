@@ -0,0 +1,113 @@
+import re
+import uuid
+from collections import Counter, defaultdict
+
+from scoring import WORD_RE
+
+SENTENCE_RE = re.compile(r'[.!?]')
+
+
+def split_sentences(text):
+    # Same pieces as re.split(r'[.!?]', text), paired with their start offsets.
+    start = 0
+    for match in SENTENCE_RE.finditer(text):
+        yield start, text[start:match.start()]
+        start = match.end()
+    yield start, text[start:]
+
+
+def highlight(sentence, spans, marker='**'):
+    parts, last = [], 0
+    for start, end in spans:
+        parts.append(sentence[last:start])
+        parts.append(f"{marker}{sentence[start:end]}{marker}")
+        last = end
+    parts.append(sentence[last:])
+    return ''.join(parts)
+
+
+class SentenceIndex:
+    # One pass over the text records, for every keyword hit, the sentence it falls
+    # in and its character span. Examples for a color are then a lookup.
+    def __init__(self, text, automaton):
+        self.text = text
+        self.sentences = []
+        self.hits = defaultdict(list)
+        seen = set()
+        term_colors = automaton.term_colors
+        for start, sentence in split_sentences(text):
+            stripped = sentence.strip()
+            if not stripped or stripped.lower() in seen:
+                continue
+            seen.add(stripped.lower())
+            start += len(sentence) - len(sentence.lstrip())
+            sentence_id = len(self.sentences)
+            self.sentences.append((start, start + len(stripped)))
+            words = list(WORD_RE.finditer(stripped))
+            tokens = [word.group().lower() for word in words]
+            for i, j, term in automaton.matches(tokens):
+                span = (start + words[i].start(), start + words[j - 1].end())
+                for color in term_colors[term]:
+                    self.hits[color].append((sentence_id, *span))
+
+    def sentence(self, sentence_id):
+        start, end = self.sentences[sentence_id]
+        return self.text[start:end]
+
+    def examples(self, color, limit=3):
+        # The sentences with the most hits for the color, returned in text order,
+        # each with its hit spans relative to the sentence.
+        spans = defaultdict(list)
+        for sentence_id, start, end in self.hits.get(color, ()):
+            spans[sentence_id].append((start, end))
+        ranked = sorted(spans, key=lambda sentence_id: (-len(spans[sentence_id]), sentence_id))[:limit]
+        examples = []
+        for sentence_id in sorted(ranked):
+            offset = self.sentences[sentence_id][0]
+            sentence_spans = sorted(set((start - offset, end - offset) for start, end in spans[sentence_id]))
+            examples.append((self.sentence(sentence_id), _merge_spans(sentence_spans)))
+        return examples
+
+
+def _merge_spans(spans):
+    merged = []
+    for start, end in spans:
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class SentenceColorModel:
+    # Per-sentence color assignments plus their running total. Reassigning one
+    # sentence applies only the difference to color_counts, so the chart can be
+    # redrawn without revisiting every sentence or keyword.
+    def __init__(self, sentences, initial_colors, base_counts=None, select_initial=True):
+        self.sentences = sentences
+        self.initial_colors = initial_colors
+        self.selected = [list(colors) if select_initial else [] for colors in initial_colors]
+        self.color_counts = Counter(base_counts or {})
+        for colors in self.selected:
+            self.color_counts.update(colors)
+        # Fresh widget keys per analysis so stale selections never leak into a new text.
+        self.key_prefix = f"sentence_colors_{uuid.uuid4().hex}"
+
+    @classmethod
+    def from_text(cls, text, automaton, base_counts=None, select_initial=True):
+        sentences, initial_colors = [], []
+        for sentence in SENTENCE_RE.split(text):
+            if not sentence.strip():
+                continue
+            counts = automaton.score(sentence)
+            sentences.append(sentence)
+            initial_colors.append([color for color in automaton.colors if counts[color]])
+        return cls(sentences, initial_colors, base_counts, select_initial)
+
+    def widget_key(self, sentence_id):
+        return f"{self.key_prefix}_{sentence_id}"
+
+    def set_colors(self, sentence_id, colors):
+        self.color_counts.subtract(self.selected[sentence_id])
+        self.color_counts.update(colors)
+        self.selected[sentence_id] = list(colors)
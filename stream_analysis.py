@@ -0,0 +1,101 @@
+import codecs
+import heapq
+from collections import Counter
+
+from scoring import WORD_RE
+from sentence_colors import SENTENCE_RE
+
+BLOCK_SIZE = 1 << 16
+MAX_SENTENCE_CHARS = 1 << 16
+
+
+def iter_blocks(source, block_size=BLOCK_SIZE):
+    # Accepts a string or a text/binary file object; binary input is decoded as
+    # UTF-8 incrementally so multi-byte characters split across blocks survive.
+    if isinstance(source, str):
+        for i in range(0, len(source), block_size):
+            yield source[i:i + block_size]
+        return
+    decoder = None
+    while True:
+        block = source.read(block_size)
+        if not block:
+            break
+        if isinstance(block, bytes):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            block = decoder.decode(block)
+        yield block
+    if decoder is not None:
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
+
+class StreamingAnalyzer:
+    # Scores text block by block, holding only the unfinished trailing sentence and
+    # a bounded heap of example sentences per color.
+    def __init__(self, automaton, examples_per_color=3, max_sentence_chars=MAX_SENTENCE_CHARS):
+        self.automaton = automaton
+        self.examples_per_color = examples_per_color
+        self.max_sentence_chars = max_sentence_chars
+        self.color_counts = Counter({color: 0 for color in automaton.colors})
+        self.chars_read = 0
+        self._examples = {color: [] for color in automaton.colors}
+        self._carry = ''
+        self._sentence_no = 0
+
+    def feed(self, block):
+        self.chars_read += len(block)
+        buffer = self._carry + block
+        start = 0
+        for match in SENTENCE_RE.finditer(buffer):
+            self._add_sentence(buffer[start:match.start()])
+            start = match.end()
+        carry = buffer[start:]
+        if len(carry) > self.max_sentence_chars:
+            # No sentence end in sight: cut at the last whitespace so no word is split.
+            cut = max(carry.rfind(' ', 0, self.max_sentence_chars), carry.rfind('\n', 0, self.max_sentence_chars))
+            if cut <= 0:
+                cut = self.max_sentence_chars
+            self._add_sentence(carry[:cut])
+            carry = carry[cut:]
+        self._carry = carry
+
+    def close(self):
+        self._add_sentence(self._carry)
+        self._carry = ''
+
+    def _add_sentence(self, sentence):
+        stripped = sentence.strip()
+        if not stripped:
+            return
+        self._sentence_no += 1
+        words = list(WORD_RE.finditer(stripped))
+        term_colors = self.automaton.term_colors
+        spans = {}
+        for i, j, term in self.automaton.matches([word.group().lower() for word in words]):
+            for color in term_colors[term]:
+                self.color_counts[color] += 1
+                spans.setdefault(color, []).append((words[i].start(), words[j - 1].end()))
+        for color, color_spans in spans.items():
+            heap = self._examples[color]
+            entry = (len(color_spans), -self._sentence_no, stripped, sorted(color_spans))
+            if len(heap) < self.examples_per_color:
+                heapq.heappush(heap, entry)
+            else:
+                heapq.heappushpop(heap, entry)
+
+    def examples(self, color):
+        # Best-scoring sentences seen so far, in the order they appeared.
+        return [(sentence, spans) for _, _, sentence, spans in sorted(self._examples[color], key=lambda entry: -entry[1])]
+
+
+def analyze_stream(source, automaton, block_size=BLOCK_SIZE, **kwargs):
+    # Yields the analyzer after every block so callers can render partial results.
+    analyzer = StreamingAnalyzer(automaton, **kwargs)
+    for block in iter_blocks(source, block_size):
+        analyzer.feed(block)
+        yield analyzer
+    analyzer.close()
+    yield analyzer
@@ -0,0 +1,84 @@
+import http.server
+import threading
+from urllib.parse import urlsplit
+
+import pytest
+
+import http_client
+from crawler import crawl
+
+# A stand-in site: robots.txt disallows /private/, /from-sitemap is linked
+# from nowhere but sitemap.xml, and the home page also links off-site, to a
+# PDF and to a fragment of a page it already links to.
+PAGES = {
+    '/': '<a href="/about">About</a><a href="/about#team">Team</a><a href="news/">News</a>'
+         '<a href="/report.pdf">Report</a><a href="/private/secret">Secret</a>'
+         '<a href="http://elsewhere.example/page">Elsewhere</a>',
+    '/about': '<a href="/">Home</a>',
+    '/news/': 'No news.',
+    '/from-sitemap': 'Only the sitemap links here.',
+    '/private/secret': 'Disallowed.',
+    '/private/listed': 'Disallowed, though the sitemap lists it.',
+    '/report.pdf': 'Not a page.',
+}
+ROBOTS = 'User-agent: *\nDisallow: /private/\n'
+
+
+class SiteHandler(http.server.BaseHTTPRequestHandler):
+    requested = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.requested.append(self.path)
+        base = f"http://{self.headers['Host']}"
+        if self.path == '/robots.txt':
+            body, content_type = ROBOTS, 'text/plain'
+        elif self.path == '/sitemap.xml':
+            body = ('<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                    f'<url><loc>{base}/from-sitemap</loc></url><url><loc>{base}/private/listed</loc></url></urlset>')
+            content_type = 'application/xml'
+        elif self.path in PAGES:
+            body, content_type = f'<html><body>{PAGES[self.path]}</body></html>', 'text/html'
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def site():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), SiteHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    SiteHandler.requested = []
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def crawled_paths(root_url, **kwargs):
+    return [urlsplit(result.url).path for result in crawl(root_url, fetch=http_client.get, **kwargs)]
+
+
+def test_crawl_follows_robots_sitemap_and_site_links(site):
+    paths = crawled_paths(site)
+    assert sorted(paths) == ['/', '/about', '/from-sitemap', '/news/']
+    assert not {'/private/secret', '/private/listed', '/report.pdf'} & set(SiteHandler.requested)
+
+
+def test_crawl_stops_at_max_pages(site):
+    # The root and the sitemap page make up the first level, so the crawl
+    # ends before following any links.
+    paths = crawled_paths(site, max_pages=2)
+    assert sorted(paths) == ['/', '/from-sitemap']
+    assert sorted(set(SiteHandler.requested) & set(PAGES)) == ['/', '/from-sitemap']
@@ -0,0 +1,41 @@
+from scoring import KeywordAutomaton, score_text
+
+
+def stemmed(color_keywords, text):
+    return dict(KeywordAutomaton(color_keywords, stem=True).score(text))
+
+
+def test_care_and_car_stay_apart():
+    keywords = {'Red': ['car'], 'Blue': ['care']}
+    assert stemmed(keywords, 'care caring cares cared') == {'Red': 0, 'Blue': 4}
+    assert stemmed(keywords, 'car cars') == {'Red': 2, 'Blue': 0}
+
+
+def test_wine_and_win_stay_apart():
+    keywords = {'Red': ['win'], 'Blue': ['wine']}
+    assert stemmed(keywords, 'wine wines wined') == {'Red': 0, 'Blue': 3}
+    assert stemmed(keywords, 'win wins winning') == {'Red': 3, 'Blue': 0}
+
+
+def test_headword_is_not_matched_through_a_short_stem():
+    assert stemmed({'Blue': ['care']}, 'car cars') == {'Blue': 0}
+    assert stemmed({'Red': ['car']}, 'care caring') == {'Red': 0}
+    assert stemmed({'Red': ['win']}, 'wine wining') == {'Red': 0}
+
+
+def test_inflections_still_match():
+    keywords = {'Green': ['empower', 'explore', 'nurture', 'commit', 'journey', 'vary']}
+    text = 'empowering explored nurtures committed journeying varies'
+    assert stemmed(keywords, text) == {'Green': 6}
+    assert dict(score_text(text, keywords)) == {'Green': 0}
+
+
+def test_word_family_shares_a_key():
+    # 'inspired' is an inflection of 'inspire', so either form scores for both colors.
+    automaton = KeywordAutomaton({'Red': ['inspire'], 'Blue': ['inspired']}, stem=True)
+    assert dict(automaton.score('inspiring')) == {'Red': 1, 'Blue': 1}
+    assert len(automaton.term_colors) == 1
+
+
+def test_phrases_match_inflected_tokens():
+    assert stemmed({'Orange': ['press on']}, 'she pressed on and presses on') == {'Orange': 2}
@@ -0,0 +1,137 @@
+import base64
+import gzip
+import hashlib
+import os
+import re
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+ENCODINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'token_encodings')
+# OpenAI's published BPE files (MIT licensed), gzipped; the hashes are those
+# tiktoken checks when it downloads them, so no network access is needed.
+ENCODINGS = {
+    'o200k_base': {
+        'file': 'o200k_base.tiktoken.gz',
+        'sha256': '446a9538cb6c348e3516120d7c08b09f57c36495e2acfffe59a5bf8b0cfb1a2d',
+        'pat_str': '|'.join((
+            r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]*[\p{Ll}\p{Lm}\p{Lo}\p{M}]+(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+            r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]+[\p{Ll}\p{Lm}\p{Lo}\p{M}]*(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+            r"""\p{N}{1,3}""",
+            r""" ?[^\s\p{L}\p{N}]+[\r\n/]*""",
+            r"""\s*[\r\n]+""",
+            r"""\s+(?!\S)""",
+            r"""\s+""",
+        )),
+        'special_tokens': {'<|endoftext|>': 199999, '<|endofprompt|>': 200018},
+    },
+    'cl100k_base': {
+        'file': 'cl100k_base.tiktoken.gz',
+        'sha256': '223921b76ee99bde995b7ff738513eef100fb51d18c93597a113bcffe865b2a7',
+        'pat_str': r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}++|\p{N}{1,3}+| ?[^\s\p{L}\p{N}]++[\r\n]*+|\s++$|\s*[\r\n]|\s+(?!\S)|\s""",
+        'special_tokens': {
+            '<|endoftext|>': 100257, '<|fim_prefix|>': 100258, '<|fim_middle|>': 100259,
+            '<|fim_suffix|>': 100260, '<|endofprompt|>': 100276,
+        },
+    },
+}
+# Encoding per model, matched by longest prefix. Llama 3's tokenizer extends
+# cl100k_base with extra tokens, so cl100k_base counts run slightly high for
+# it, which is the safe side for chunk budgets.
+MODEL_ENCODINGS = {
+    'gpt-4o': 'o200k_base',
+    'gpt-4.1': 'o200k_base',
+    'o1': 'o200k_base',
+    'o3': 'o200k_base',
+    'gpt-4': 'cl100k_base',
+    'gpt-3.5-turbo': 'cl100k_base',
+    'text-embedding-3': 'cl100k_base',
+    'llama3': 'cl100k_base',
+    'llama-3': 'cl100k_base',
+}
+DEFAULT_ENCODING = 'o200k_base'
+# Context window per model, matched by longest prefix; the prompt and the
+# completion (max_tokens) share it. Unknown models get the smallest window.
+CONTEXT_WINDOWS = {
+    'gpt-4o': 128000,
+    'gpt-4-turbo': 128000,
+    'gpt-4': 8192,
+    'gpt-3.5-turbo': 16385,
+    'text-davinci-003': 4097,
+    'llama3-70b-8192': 8192,
+    'llama3-8b-8192': 8192,
+}
+DEFAULT_CONTEXT_WINDOW = 4096
+# Chat formatting (role markers, message separators) on top of the text itself.
+MESSAGE_OVERHEAD_TOKENS = 32
+# Without tiktoken, words and punctuation marks are counted instead; for
+# English prose that lands within roughly 15% of the BPE count.
+ESTIMATE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def encoding_name(model=None):
+    if not model:
+        return DEFAULT_ENCODING
+    model = model.lower()
+    for prefix in sorted(MODEL_ENCODINGS, key=len, reverse=True):
+        if model.startswith(prefix):
+            return MODEL_ENCODINGS[prefix]
+    return DEFAULT_ENCODING
+
+
+def context_window(model=None):
+    model = (model or '').lower()
+    for prefix in sorted(CONTEXT_WINDOWS, key=len, reverse=True):
+        if model.startswith(prefix):
+            return CONTEXT_WINDOWS[prefix]
+    return DEFAULT_CONTEXT_WINDOW
+
+
+def content_budget(model, prompt_tokens, max_tokens):
+    # Tokens left for content once the prompt and the completion are reserved.
+    # At least 1, so a prompt that fills the window still chunks block by block.
+    return max(1, context_window(model) - prompt_tokens - max_tokens - MESSAGE_OVERHEAD_TOKENS)
+
+
+def _load_ranks(spec):
+    with open(os.path.join(ENCODINGS_DIR, spec['file']), 'rb') as f:
+        data = gzip.decompress(f.read())
+    if hashlib.sha256(data).hexdigest() != spec['sha256']:
+        raise ValueError(f"{spec['file']} does not match its expected hash")
+    ranks = {}
+    for line in data.splitlines():
+        if line:
+            token, rank = line.split()
+            ranks[base64.b64decode(token)] = int(rank)
+    return ranks
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name=DEFAULT_ENCODING):
+    spec = ENCODINGS[name]
+    return tiktoken.Encoding(name, pat_str=spec['pat_str'], mergeable_ranks=_load_ranks(spec),
+                             special_tokens=spec['special_tokens'])
+
+
+def _tiktoken_count(text, model):
+    # Special-token strings in page text are counted as ordinary text.
+    return len(get_encoding(encoding_name(model)).encode_ordinary(text))
+
+
+def _estimate_count(text, model):
+    return len(ESTIMATE_RE.findall(text))
+
+
+BACKENDS = {'estimate': _estimate_count}
+if tiktoken is not None:
+    BACKENDS['tiktoken'] = _tiktoken_count
+DEFAULT_BACKEND = 'tiktoken' if tiktoken is not None else 'estimate'
+
+
+def count_tokens(text, model=None, backend=DEFAULT_BACKEND):
+    if not text:
+        return 0
+    return BACKENDS[backend](text, model)